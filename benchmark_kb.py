@@ -0,0 +1,76 @@
+import logging
+import random
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import chromadb
+
+from src.core.config import settings
+from src.services.vector_store import ChromaVectorStore, MemoryVectorStore, PartitionedChromaVectorStore
+
+# --- Setup Logging ---
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Compares dense query latency across vector store layouts as the number of
+# concurrent chats grows. Uses random vectors, so no Bedrock calls are made.
+CHAT_COUNTS = [1, 10, 50, 200]
+CHUNKS_PER_CHAT = 100
+QUERIES = 200
+QUERY_THREADS = 8
+DIMENSIONS = 256
+
+
+def _vector() -> list[float]:
+    return [random.gauss(0, 1) for _ in range(DIMENSIONS)]
+
+
+def _populate(store, chat_ids: list[str]) -> None:
+    for chat_id in chat_ids:
+        ids = [f"{chat_id}-{i}" for i in range(CHUNKS_PER_CHAT)]
+        store.add(
+            chat_id,
+            ids,
+            [f"chunk {i} of {chat_id}" for i in range(CHUNKS_PER_CHAT)],
+            [{"chat_id": chat_id, "filename": "bench.txt"} for _ in ids],
+            [_vector() for _ in ids],
+        )
+
+
+def _measure(store, chat_ids: list[str]) -> tuple[float, float]:
+    queries = [(random.choice(chat_ids), _vector()) for _ in range(QUERIES)]
+
+    def run(item) -> float:
+        chat_id, vector = item
+        started = time.perf_counter()
+        store.query(chat_id, vector, n_results=settings.HYBRID_CANDIDATES)
+        return (time.perf_counter() - started) * 1000
+
+    with ThreadPoolExecutor(max_workers=QUERY_THREADS) as pool:
+        latencies = sorted(pool.map(run, queries))
+    return statistics.median(latencies), latencies[int(len(latencies) * 0.95) - 1]
+
+
+def main():
+    for n_chats in CHAT_COUNTS:
+        chat_ids = [f"chat{i:04d}" for i in range(n_chats)]
+        with tempfile.TemporaryDirectory() as path:
+            client = chromadb.PersistentClient(path=path)
+            stores = {
+                "shared": ChromaVectorStore(client, collection_name="bench", embedding_function=None),
+                "per-chat": PartitionedChromaVectorStore(client, base_name="bench", embedding_function=None),
+                "bucket-16": PartitionedChromaVectorStore(
+                    client, base_name="benchb", embedding_function=None, buckets=16
+                ),
+                "memory": MemoryVectorStore(dimensions=DIMENSIONS),
+            }
+            for name, store in stores.items():
+                _populate(store, chat_ids)
+                p50, p95 = _measure(store, chat_ids)
+                logger.info(f"chats={n_chats:4d} store={name:10s} p50={p50:7.2f}ms p95={p95:7.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
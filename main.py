@@ -1,4 +1,5 @@
 import logging
+import contextlib
 import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -7,17 +8,28 @@ from fastapi.staticfiles import StaticFiles
 
 from src.core.config import settings
 from src.core.auth import get_aws_session
+from src.core.clients import BedrockClientFactory
+from src.core.images import check_rendition_support
 from src.core.sessions import SessionStore
 from src.services.knowledge_base import KnowledgeBaseService
+from src.services.ingest_jobs import IngestJobManager
+from src.services.prefetch import RetrievalPrefetcher
 from src.services.voice_orchestrator import VoiceOrchestrator
-from src.api.routes import ingest, websocket, media
+from src.api.routes import ingest, websocket, media, metrics
 
 # Setup Logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+@contextlib.asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    await app.state.ingest_jobs.shutdown()
+    app.state.kb.close()
+    app.state.sessions.attachments.close()
+
 def create_app() -> FastAPI:
-    app = FastAPI(title=settings.PROJECT_NAME)
+    app = FastAPI(title=settings.PROJECT_NAME, lifespan=lifespan)
 
     app.add_middleware(
         CORSMiddleware,
@@ -27,16 +39,24 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
 
+    check_rendition_support()
+
     # Dependency Initialization
     session = get_aws_session()
-    kb_service = KnowledgeBaseService(session)
+    clients = BedrockClientFactory(session)
+    kb_service = KnowledgeBaseService(clients)
     sessions = SessionStore()
-    orchestrator = VoiceOrchestrator(session, kb_service, sessions)
+    prefetcher = RetrievalPrefetcher(kb_service)
+    orchestrator = VoiceOrchestrator(session, kb_service, sessions, clients, prefetcher)
+    ingest_jobs = IngestJobManager(kb_service, workers=settings.INGEST_WORKERS, queue_max=settings.INGEST_QUEUE_MAX)
 
     # Store in app state for route access
+    app.state.clients = clients
     app.state.kb = kb_service
     app.state.orchestrator = orchestrator
     app.state.sessions = sessions
+    app.state.ingest_jobs = ingest_jobs
+    app.state.prefetcher = prefetcher
 
     # Mount Static Files
     app.mount("/static", StaticFiles(directory="static"), name="static")
@@ -45,6 +65,7 @@ def create_app() -> FastAPI:
     app.include_router(ingest.router)
     app.include_router(websocket.router)
     app.include_router(media.router)
+    app.include_router(metrics.router)
 
     @app.get("/", response_class=HTMLResponse)
     async def index():
@@ -53,7 +74,8 @@ def create_app() -> FastAPI:
 
     return app
 
-app = create_app()
-
+# No app at import time: PDF extraction workers are spawned processes that re-import
+# this module, and must not open a second Chroma client or the SQLite caches.
+# (For an external server: `uvicorn main:create_app --factory`.)
 if __name__ == "__main__":
-    uvicorn.run(app, host=settings.HOST, port=settings.PORT)
+    uvicorn.run(create_app(), host=settings.HOST, port=settings.PORT)
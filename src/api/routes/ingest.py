@@ -1,28 +1,41 @@
 from fastapi import APIRouter, UploadFile, File, Request, Query, HTTPException
 from src.services.knowledge_base import KnowledgeBaseService
+from src.services.ingest_jobs import IngestJobManager, IngestQueueFull
 from src.core.sessions import SessionStore
 
 router = APIRouter(prefix="/api/knowledge", tags=["knowledge"])
 
-@router.post("/ingest")
+@router.post("/ingest", status_code=202)
 async def ingest_document(
     request: Request,
     chat_id: str = Query(..., description="Unique chat ID for scoping this knowledge base"),
+    replace: bool = Query(True, description="Replace an existing document with the same filename, re-embedding only changed chunks"),
     file: UploadFile = File(...),
 ):
-    kb: KnowledgeBaseService = request.app.state.kb
+    jobs: IngestJobManager = request.app.state.ingest_jobs
     sessions: SessionStore = request.app.state.sessions
     if not await sessions.exists(chat_id):
         raise HTTPException(status_code=404, detail="Unknown or expired chat_id")
     content = await file.read()
-    
-    if file.filename.lower().endswith(".pdf"):
-        chunks = kb.ingest_pdf(content, file.filename, chat_id=chat_id)
-    else:
-        text = content.decode("utf-8", errors="ignore")
-        chunks = kb.ingest_text(text, chat_id=chat_id, metadata={"filename": file.filename, "type": "text"})
-        
-    return {"status": "success", "filename": file.filename, "chunks": chunks}
+
+    try:
+        job = jobs.submit(chat_id=chat_id, filename=file.filename, content=content, replace=replace)
+    except IngestQueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
+
+    return {"status": "accepted", "filename": file.filename, "job": job.to_dict()}
+
+@router.get("/jobs/{job_id}")
+async def ingest_job_status(
+    request: Request,
+    job_id: str,
+    chat_id: str = Query(..., description="Unique chat ID that owns the job"),
+):
+    jobs: IngestJobManager = request.app.state.ingest_jobs
+    job = jobs.get(job_id)
+    if job is None or job.chat_id != chat_id:
+        raise HTTPException(status_code=404, detail="Unknown ingest job")
+    return {"status": "success", "job": job.to_dict()}
 
 @router.post("/reset")
 async def reset_kb(
@@ -33,7 +46,7 @@ async def reset_kb(
     sessions: SessionStore = request.app.state.sessions
     if not await sessions.exists(chat_id):
         raise HTTPException(status_code=404, detail="Unknown or expired chat_id")
-    success = kb.clear_chat(chat_id)
+    success = await kb.aclear_chat(chat_id)
     return {"status": "success" if success else "error"}
 
 @router.get("/list")
@@ -45,5 +58,26 @@ async def list_documents(
     sessions: SessionStore = request.app.state.sessions
     if not await sessions.exists(chat_id):
         raise HTTPException(status_code=404, detail="Unknown or expired chat_id")
-    documents = kb.list_all_documents(chat_id=chat_id)
+    documents = await kb.alist_documents(chat_id=chat_id)
     return {"status": "success", "documents": documents}
+
+# :path so client-supplied names containing "/" can be deleted too.
+@router.delete("/documents/{filename:path}")
+async def delete_document(
+    request: Request,
+    filename: str,
+    chat_id: str = Query(..., description="Unique chat ID that owns the document"),
+):
+    kb: KnowledgeBaseService = request.app.state.kb
+    sessions: SessionStore = request.app.state.sessions
+    if not await sessions.exists(chat_id):
+        raise HTTPException(status_code=404, detail="Unknown or expired chat_id")
+    removed = await kb.adelete_document(filename, chat_id=chat_id)
+    if not removed:
+        raise HTTPException(status_code=404, detail="Unknown document")
+    return {"status": "success", "filename": filename, "chunks_removed": removed}
+
+@router.get("/cache")
+async def embedding_cache_stats(request: Request):
+    kb: KnowledgeBaseService = request.app.state.kb
+    return {"status": "success", "cache": kb.embedding_cache_stats()}
@@ -1,11 +1,20 @@
 import uuid
-from fastapi import APIRouter, UploadFile, File, Request, Query, HTTPException
+from typing import Any, AsyncIterator, Tuple
 
+from fastapi import APIRouter, Request, Query, HTTPException
+from python_multipart.exceptions import MultipartParseError
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+from src.core.attachments import AttachmentQuotaExceeded, AttachmentTooLarge, ChatAttachment
+from src.core.executors import run_in
 from src.core.sessions import SessionStore
 from src.core.config import settings
 
 router = APIRouter(prefix="/api/media", tags=["media"])
 
+# Room for multipart boundaries and part headers on top of the file itself.
+_MULTIPART_OVERHEAD = 64 * 1024
+
 
 def _guess_media_type(content_type: str) -> str:
     ct = (content_type or "").lower()
@@ -20,36 +29,160 @@ def _guess_media_type(content_type: str) -> str:
     return "unknown"
 
 
+def _rendition_info(attachment: ChatAttachment) -> dict | None:
+    rendition = attachment.rendition
+    if rendition is None:
+        return None
+    return {
+        "content_type": rendition.content_type,
+        "width": rendition.width,
+        "height": rendition.height,
+        "bytes": rendition.size,
+    }
+
+
+async def _iter_file_part(request: Request) -> AsyncIterator[Tuple[str, Any]]:
+    """Push-parses the multipart body as it streams in, yielding the `file` part only.
+
+    Yields ``("file", (filename, content_type))`` when a file part's headers are
+    complete, then ``("data", bytes)`` for each slice of its body. Other parts are skipped.
+    """
+    body_type, params = parse_options_header(request.headers.get("content-type", ""))
+    boundary = params.get(b"boundary")
+    if body_type != b"multipart/form-data" or not boundary:
+        raise HTTPException(status_code=400, detail="Expected a multipart/form-data body")
+
+    events: list[Tuple[str, Any]] = []
+    headers: dict[bytes, bytes] = {}
+    field = bytearray()
+    value = bytearray()
+    in_file = False
+
+    def on_part_begin() -> None:
+        headers.clear()
+
+    def on_header_field(data: bytes, start: int, end: int) -> None:
+        field.extend(data[start:end])
+
+    def on_header_value(data: bytes, start: int, end: int) -> None:
+        value.extend(data[start:end])
+
+    def on_header_end() -> None:
+        headers[bytes(field).lower()] = bytes(value)
+        field.clear()
+        value.clear()
+
+    def on_headers_finished() -> None:
+        nonlocal in_file
+        _, options = parse_options_header(headers.get(b"content-disposition", b""))
+        in_file = options.get(b"name") == b"file" and b"filename" in options
+        if in_file:
+            filename = options[b"filename"].decode("utf-8", "replace")
+            events.append(("file", (filename, headers.get(b"content-type", b"").decode("latin-1"))))
+
+    def on_part_data(data: bytes, start: int, end: int) -> None:
+        if in_file:
+            events.append(("data", data[start:end]))
+
+    def on_part_end() -> None:
+        nonlocal in_file
+        in_file = False
+
+    parser = MultipartParser(
+        boundary,
+        {
+            "on_part_begin": on_part_begin,
+            "on_header_field": on_header_field,
+            "on_header_value": on_header_value,
+            "on_header_end": on_header_end,
+            "on_headers_finished": on_headers_finished,
+            "on_part_data": on_part_data,
+            "on_part_end": on_part_end,
+        },
+    )
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+            for event in events:
+                yield event
+            events.clear()
+        parser.finalize()
+    except MultipartParseError as e:
+        raise HTTPException(status_code=400, detail=f"Malformed multipart body: {e}")
+
+
 @router.post("/upload")
 async def upload_media(
     request: Request,
     chat_id: str = Query(..., description="Unique chat ID for scoping uploads"),
-    file: UploadFile = File(...),
 ):
+    """Multipart upload with a single `file` part.
+
+    The body is parsed as it streams in rather than via `File(...)` (which spools the
+    whole upload first): a declared oversize body is rejected before any of it is
+    read, and the file part goes straight into the attachment store in chunks, hashed
+    on the way, and is abandoned as soon as it crosses the limit.
+    """
     sessions: SessionStore = request.app.state.sessions
     if not await sessions.exists(chat_id):
         raise HTTPException(status_code=404, detail="Unknown or expired chat_id")
 
-    content_type = file.content_type or "application/octet-stream"
-    media_type = _guess_media_type(content_type)
-    if media_type not in {"image", "video", "document", "audio"}:
-        raise HTTPException(status_code=400, detail=f"Unsupported content_type: {content_type}")
-
     max_mb = int(getattr(settings, "MEDIA_UPLOAD_MAX_MB", 25))
     max_bytes = max_mb * 1024 * 1024
-    data = await file.read()
-    if len(data) > max_bytes:
+    declared = request.headers.get("content-length", "")
+    if declared.isdigit() and int(declared) > max_bytes + _MULTIPART_OVERHEAD:
+        raise HTTPException(status_code=413, detail=f"File too large (max {max_mb}MB)")
+
+    chunk_size = max(1, settings.MEDIA_UPLOAD_CHUNK_KB) * 1024
+    writer = None
+    filename = content_type = media_type = None
+    received = 0
+    buffer = bytearray()
+    try:
+        async for kind, value in _iter_file_part(request):
+            if kind == "file":
+                if writer is not None:
+                    raise HTTPException(status_code=400, detail="Only one 'file' part is allowed")
+                filename, content_type = value
+                content_type = content_type or "application/octet-stream"
+                media_type = _guess_media_type(content_type)
+                if media_type not in {"image", "video", "document", "audio"}:
+                    raise HTTPException(status_code=400, detail=f"Unsupported content_type: {content_type}")
+                writer = sessions.attachments.open_writer(max_bytes=max_bytes)
+                continue
+            received += len(value)
+            if received > max_bytes:
+                raise AttachmentTooLarge(f"Upload exceeds {max_bytes} bytes")
+            buffer += value
+            if len(buffer) >= chunk_size:
+                await run_in("media", writer.write, bytes(buffer))
+                buffer.clear()
+        if writer is None:
+            raise HTTPException(status_code=400, detail="Missing 'file' part")
+        if buffer:
+            await run_in("media", writer.write, bytes(buffer))
+        payload = await run_in("media", writer.finish)
+    except AttachmentTooLarge:
+        writer.abort()
         raise HTTPException(status_code=413, detail=f"File too large (max {max_mb}MB)")
+    except BaseException:
+        if writer is not None:
+            writer.abort()
+        raise
 
     attachment_id = uuid.uuid4().hex
-    attachment = await sessions.add_attachment(
-        chat_id,
-        attachment_id=attachment_id,
-        filename=file.filename or attachment_id,
-        content_type=content_type,
-        media_type=media_type,  # type: ignore[arg-type]
-        data=data,
-    )
+    try:
+        attachment = await sessions.add_attachment(
+            chat_id,
+            attachment_id=attachment_id,
+            filename=filename or attachment_id,
+            content_type=content_type,
+            media_type=media_type,  # type: ignore[arg-type]
+            payload=payload,
+        )
+    except AttachmentQuotaExceeded as e:
+        payload.release()
+        raise HTTPException(status_code=413, detail=str(e))
     if attachment is None:
         raise HTTPException(status_code=404, detail="Unknown or expired chat_id")
 
@@ -60,7 +193,9 @@ async def upload_media(
             "filename": attachment.filename,
             "content_type": attachment.content_type,
             "media_type": attachment.media_type,
-            "bytes": len(attachment.data),
+            "bytes": attachment.size,
+            "sha256": attachment.payload.sha256,
+            "rendition": _rendition_info(attachment),
         },
     }
 
@@ -83,7 +218,9 @@ async def list_media(
                 "filename": a.filename,
                 "content_type": a.content_type,
                 "media_type": a.media_type,
-                "bytes": len(a.data),
+                "bytes": a.size,
+                "spilled": a.payload.spilled,
+                "rendition": _rendition_info(a),
                 "created_at": a.created_at.isoformat(),
             }
             for a in items
@@ -103,3 +240,9 @@ async def clear_media(
     ok = await sessions.clear_attachments(chat_id)
     return {"status": "success" if ok else "error"}
 
+
+
+@router.get("/stats")
+async def media_stats(request: Request):
+    sessions: SessionStore = request.app.state.sessions
+    return {"status": "success", "store": sessions.attachments.stats()}
@@ -0,0 +1,62 @@
+from fastapi import APIRouter, Request
+
+from src.core.clients import BedrockClientFactory
+from src.core.executors import executor_stats
+from src.core.resilience import model_guard_stats
+from src.services.knowledge_base import KnowledgeBaseService
+from src.services.prefetch import RetrievalPrefetcher
+from src.services.synthesis import synthesis_stats
+from src.services.web_cache import web_cache_stats
+from src.tools.multimodal import result_cache as multimodal_cache
+from src.tools.web import hedge_stats
+
+router = APIRouter(prefix="/api/metrics", tags=["metrics"])
+
+
+@router.get("/clients")
+async def client_metrics(request: Request):
+    clients: BedrockClientFactory = request.app.state.clients
+    return {"status": "success", "clients": clients.stats()}
+
+
+@router.get("/executors")
+async def executor_metrics():
+    return {"status": "success", "executors": executor_stats()}
+
+
+@router.get("/models")
+async def model_metrics():
+    return {"status": "success", "models": model_guard_stats()}
+
+
+@router.get("/query-embeddings")
+async def query_embedding_metrics(request: Request):
+    kb: KnowledgeBaseService = request.app.state.kb
+    return {"status": "success", "batcher": kb.query_embedder.stats()}
+
+
+@router.get("/rag-answers")
+async def rag_answer_metrics(request: Request):
+    kb: KnowledgeBaseService = request.app.state.kb
+    return {"status": "success", "cache": kb.answer_cache_stats()}
+
+
+@router.get("/web-search")
+async def web_search_metrics():
+    return {"status": "success", "caches": web_cache_stats(), "hedging": hedge_stats.stats()}
+
+
+@router.get("/synthesis")
+async def synthesis_metrics():
+    return {"status": "success", "tools": synthesis_stats.stats()}
+
+
+@router.get("/prefetch")
+async def prefetch_metrics(request: Request):
+    prefetcher: RetrievalPrefetcher = request.app.state.prefetcher
+    return {"status": "success", "prefetch": prefetcher.stats()}
+
+
+@router.get("/multimodal")
+async def multimodal_metrics():
+    return {"status": "success", "cache": multimodal_cache.stats()}
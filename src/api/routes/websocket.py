@@ -12,6 +12,8 @@ from strands.experimental.bidi import (
 from src.core.config import settings
 from src.core.sessions import SessionStore
 from src.services.voice_orchestrator import VoiceOrchestrator
+from src.services.ingest_jobs import IngestJobManager
+from src.services.prefetch import RetrievalPrefetcher
 
 router = APIRouter(tags=["voice"])
 logger = logging.getLogger(__name__)
@@ -88,6 +90,8 @@ async def voice_websocket(websocket: WebSocket):
     orchestrator: VoiceOrchestrator = websocket.app.state.orchestrator
     kb = websocket.app.state.kb
     sessions: SessionStore = websocket.app.state.sessions
+    ingest_jobs: IngestJobManager = websocket.app.state.ingest_jobs
+    prefetcher: RetrievalPrefetcher = websocket.app.state.prefetcher
 
     qp = websocket.query_params
     voice = qp.get("voice") or None
@@ -141,6 +145,11 @@ async def voice_websocket(websocket: WebSocket):
             await websocket.send_bytes(data)
         except Exception:
             raise
+
+    async def send_ingest_progress(job: dict) -> None:
+        await safe_send_text({"event": {"ingestProgress": job}})
+
+    ingest_jobs.subscribe(chat_id, send_ingest_progress)
     
     async def agent_receiver():
         current_bot_text = ""
@@ -148,6 +157,9 @@ async def voice_websocket(websocket: WebSocket):
             async for event in agent.receive():
                 if isinstance(event, BidiTranscriptStreamEvent):
                     if event.role == "user" and event.text:
+                        if event.is_final:
+                            # Overlaps retrieval with Sonic's own tool decision.
+                            prefetcher.on_user_transcript(chat_id, event.text)
                         await safe_send_text({"event": {"userTranscript": event.text}})
                     
                     if event.role == "assistant" and event.text:
@@ -213,6 +225,10 @@ async def voice_websocket(websocket: WebSocket):
             await receiver_task
         with contextlib.suppress(Exception):
             await agent.stop()
+        ingest_jobs.unsubscribe(chat_id, send_ingest_progress)
+        prefetcher.discard(chat_id)
         await sessions.remove(chat_id)
-        kb.clear_chat(chat_id)
+        # Stop in-flight ingests first so no chunks are written after the clear.
+        await ingest_jobs.cancel_chat(chat_id)
+        await kb.aclear_chat(chat_id)
         logger.info("Voice session ended")
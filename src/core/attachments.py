@@ -0,0 +1,448 @@
+import hashlib
+import logging
+import mmap
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Literal, Optional, Tuple
+
+from src.core.config import settings
+from src.core.images import ImageRendition, make_image_rendition
+
+logger = logging.getLogger(__name__)
+
+MediaType = Literal["image", "video", "document", "audio", "unknown"]
+_MB = 1024 * 1024
+
+
+class AttachmentQuotaExceeded(ValueError):
+    """Raised when a single attachment is larger than the per-chat or total quota."""
+
+
+class AttachmentTooLarge(ValueError):
+    """Raised by AttachmentWriter as soon as an upload crosses its size limit."""
+
+
+class AttachmentUnavailable(RuntimeError):
+    """Raised when reading an attachment whose bytes were released (removed, replaced or evicted)."""
+
+
+class AttachmentPayload:
+    """Attachment bytes, either resident in memory or spilled to a temp file and mmap'd on access."""
+
+    def __init__(self, data: bytes, *, sha256: str | None = None) -> None:
+        self.size = len(data)
+        self.sha256 = sha256 if sha256 is not None else hashlib.sha256(data).hexdigest()
+        self.path: str | None = None
+        self._data: bytes | None = data
+        self._map: mmap.mmap | None = None
+        # Derived from the bytes, so it is shared by every attachment deduplicated onto this payload.
+        self.rendition: ImageRendition | None = None
+        self._released = False
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_file(cls, path: str, *, size: int, sha256: str) -> "AttachmentPayload":
+        """Payload for bytes already written to ``path`` (which the payload now owns)."""
+        payload = cls(b"", sha256=sha256)
+        payload.size = size
+        payload.path = path
+        payload._data = None
+        return payload
+
+    @property
+    def spilled(self) -> bool:
+        return self.path is not None
+
+    @property
+    def stored_bytes(self) -> int:
+        """Bytes held for this payload: the upload plus its in-memory rendition, if any."""
+        rendition = self.rendition
+        return self.size + (rendition.size if rendition is not None else 0)
+
+    def view(self) -> bytes | mmap.mmap:
+        """Bytes-like view (bytes or a read-only mmap) accepted by boto3 blob parameters.
+
+        The view stays readable after the payload is released, so callers should take it
+        once, up front, and hold on to it. Raises AttachmentUnavailable once released.
+        """
+        data = self._data
+        if data is not None:
+            return data
+        with self._lock:
+            if self._released:
+                raise AttachmentUnavailable("Attachment bytes were released")
+            if self._map is None:
+                with open(self.path, "rb") as f:
+                    self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            return self._map
+
+    def spill(self, directory: str) -> None:
+        with self._lock:
+            if self.spilled or self._data is None or self.size == 0:
+                return
+            fd, path = tempfile.mkstemp(prefix="att-", dir=directory)
+            with os.fdopen(fd, "wb") as f:
+                f.write(self._data)
+            # Publish the path before dropping the bytes so concurrent readers always find one.
+            self.path = path
+            self._data = None
+
+    def release(self) -> None:
+        # The mapping is left to the garbage collector: a tool call may still be reading it,
+        # and an unlinked file stays readable through an existing mapping.
+        with self._lock:
+            self._released = True
+            self._data = None
+            self._map = None
+            self.rendition = None
+            if self.path is not None:
+                try:
+                    os.unlink(self.path)
+                except FileNotFoundError:
+                    pass
+
+
+class AttachmentWriter:
+    """Receives an upload chunk by chunk, hashing as it goes.
+
+    Bytes are buffered in memory until ``spill_threshold_bytes`` and streamed to a temp
+    file after that, so at most one chunk is held beyond what is already stored.
+    ``write`` raises AttachmentTooLarge the moment ``max_bytes`` is crossed. Blocking.
+    """
+
+    def __init__(self, *, max_bytes: int, spill_threshold_bytes: int | None, spill_dir: str | None) -> None:
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._spill_threshold_bytes = spill_threshold_bytes
+        self._spill_dir = spill_dir
+        self._hash = hashlib.sha256()
+        self._buffer = bytearray()
+        self._file = None
+        self._path: str | None = None
+
+    def write(self, chunk: bytes) -> None:
+        if self.size + len(chunk) > self.max_bytes:
+            self.abort()
+            raise AttachmentTooLarge(f"Upload exceeds {self.max_bytes} bytes")
+        self.size += len(chunk)
+        self._hash.update(chunk)
+        if self._file is None and self._spill_threshold_bytes is not None and self.size > self._spill_threshold_bytes:
+            fd, self._path = tempfile.mkstemp(prefix="att-", dir=self._spill_dir)
+            self._file = os.fdopen(fd, "wb")
+            self._file.write(self._buffer)
+            self._buffer = bytearray()
+        if self._file is not None:
+            self._file.write(chunk)
+        else:
+            self._buffer += chunk
+
+    def finish(self) -> AttachmentPayload:
+        digest = self._hash.hexdigest()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            return AttachmentPayload.from_file(self._path, size=self.size, sha256=digest)
+        data, self._buffer = bytes(self._buffer), bytearray()
+        return AttachmentPayload(data, sha256=digest)
+
+    def abort(self) -> None:
+        self._buffer = bytearray()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._path is not None:
+            try:
+                os.unlink(self._path)
+            except FileNotFoundError:
+                pass
+            self._path = None
+
+
+@dataclass
+class ChatAttachment:
+    attachment_id: str
+    filename: str
+    content_type: str
+    media_type: MediaType
+    payload: AttachmentPayload
+    created_at: datetime
+
+    @property
+    def data(self) -> bytes | mmap.mmap:
+        return self.payload.view()
+
+    @property
+    def size(self) -> int:
+        return self.payload.size
+
+    @property
+    def stored_bytes(self) -> int:
+        """What the attachment is charged against quotas: its bytes plus the rendition's."""
+        return self.payload.stored_bytes
+
+    @property
+    def rendition(self) -> ImageRendition | None:
+        """Downscaled, upright copy made at upload time (images only; None if the original is already fine)."""
+        return self.payload.rendition
+
+
+@dataclass
+class _Blob:
+    payload: AttachmentPayload
+    refs: int = 0
+
+
+class AttachmentStore:
+    """In-memory attachment store with per-chat and total byte quotas.
+
+    Payloads are content-addressed: identical uploads (same SHA-256), in one chat or
+    many, share a single refcounted blob that is released when its last attachment
+    goes. Byte accounting includes image renditions. The per-chat quota counts each
+    attachment's stored bytes; the total quota counts unique blob bytes. Adding past a quota evicts least-recently-used attachments
+    (first within the chat, then across chats); an attachment larger than a quota on
+    its own is rejected. Methods block (subclasses may do file I/O), so async callers
+    run them off the loop.
+    """
+
+    def __init__(self, *, chat_quota_bytes: int, total_quota_bytes: int) -> None:
+        self.chat_quota_bytes = chat_quota_bytes
+        self.total_quota_bytes = total_quota_bytes
+        self._lock = threading.Lock()
+        self._lru: "OrderedDict[Tuple[str, str], ChatAttachment]" = OrderedDict()
+        self._blobs: Dict[str, _Blob] = {}
+        self._chat_bytes: Dict[str, int] = {}
+        self._total_bytes = 0
+        self._evictions = 0
+        self._dedup_hits = 0
+
+    def open_writer(self, *, max_bytes: int) -> AttachmentWriter:
+        return AttachmentWriter(max_bytes=max_bytes, spill_threshold_bytes=None, spill_dir=None)
+
+    def _prepare(self, attachment: ChatAttachment) -> None:
+        """Runs before a new blob is inserted, outside the lock; duplicates reuse its result."""
+        if attachment.media_type == "image":
+            attachment.payload.rendition = make_image_rendition(attachment.data)
+
+    def _after_add(self) -> None:
+        """Hook run after insertion, outside the lock."""
+
+    def _unref_locked(self, payload: AttachmentPayload) -> AttachmentPayload | None:
+        """Drops one reference; returns the payload if it is now unreferenced (to release outside the lock)."""
+        blob = self._blobs[payload.sha256]
+        blob.refs -= 1
+        if blob.refs:
+            return None
+        del self._blobs[payload.sha256]
+        self._total_bytes -= payload.stored_bytes
+        return payload
+
+    def _remove_locked(self, key: Tuple[str, str]) -> AttachmentPayload | None:
+        attachment = self._lru.pop(key)
+        self._chat_bytes[key[0]] -= attachment.stored_bytes
+        if not self._chat_bytes[key[0]]:
+            del self._chat_bytes[key[0]]
+        return self._unref_locked(attachment.payload)
+
+    @staticmethod
+    def _release(payloads: List[AttachmentPayload | None]) -> None:
+        for payload in payloads:
+            if payload is not None:
+                payload.release()
+
+    def add(self, chat_id: str, attachment: ChatAttachment) -> None:
+        if attachment.size > self.chat_quota_bytes or attachment.size > self.total_quota_bytes:
+            raise AttachmentQuotaExceeded(
+                f"Attachment of {attachment.size} bytes exceeds the per-chat or total attachment quota"
+            )
+        incoming = attachment.payload
+        with self._lock:
+            known = incoming.sha256 in self._blobs
+        if not known:
+            self._prepare(attachment)
+        released: List[AttachmentPayload | None] = []
+        with self._lock:
+            blob = self._blobs.get(incoming.sha256)
+            charge = (blob.payload if blob is not None else incoming).stored_bytes
+            if charge > self.chat_quota_bytes or charge > self.total_quota_bytes:
+                raise AttachmentQuotaExceeded(
+                    f"Attachment of {charge} bytes (with its rendition) exceeds the per-chat or total attachment quota"
+                )
+            if blob is None:
+                blob = self._blobs[incoming.sha256] = _Blob(incoming)
+                self._total_bytes += charge
+            elif blob.payload is not incoming:
+                # Same content already stored: point at the shared blob, drop this copy.
+                attachment.payload = blob.payload
+                released.append(incoming)
+                self._dedup_hits += 1
+            # Hold our reference before evicting, so eviction can never free the blob we point at.
+            blob.refs += 1
+            key = (chat_id, attachment.attachment_id)
+            evicted = 0
+            if key in self._lru:
+                released.append(self._remove_locked(key))
+            chat_keys = [k for k in self._lru if k[0] == chat_id]
+            while self._chat_bytes.get(chat_id, 0) + charge > self.chat_quota_bytes and chat_keys:
+                released.append(self._remove_locked(chat_keys.pop(0)))
+                evicted += 1
+            while self._total_bytes > self.total_quota_bytes and self._lru:
+                released.append(self._remove_locked(next(iter(self._lru))))
+                evicted += 1
+            self._lru[key] = attachment
+            self._chat_bytes[chat_id] = self._chat_bytes.get(chat_id, 0) + charge
+            self._evictions += evicted
+        if evicted:
+            logger.info(f"Evicted {evicted} attachment(s) to stay within quota.")
+        self._release(released)
+        self._after_add()
+
+    def get(self, chat_id: str, attachment_id: str) -> Optional[ChatAttachment]:
+        with self._lock:
+            attachment = self._lru.get((chat_id, attachment_id))
+            if attachment is not None:
+                self._lru.move_to_end((chat_id, attachment_id))
+            return attachment
+
+    def list(self, chat_id: str) -> List[ChatAttachment]:
+        with self._lock:
+            attachments = [a for (c, _), a in self._lru.items() if c == chat_id]
+        return sorted(attachments, key=lambda a: a.created_at)
+
+    def latest(self, chat_id: str, *, media_type: MediaType | None = None) -> Optional[ChatAttachment]:
+        candidates = [a for a in self.list(chat_id) if media_type is None or a.media_type == media_type]
+        if not candidates:
+            return None
+        return self.get(chat_id, candidates[-1].attachment_id)
+
+    def clear_chat(self, chat_id: str) -> None:
+        with self._lock:
+            released = [self._remove_locked(key) for key in [k for k in self._lru if k[0] == chat_id]]
+        self._release(released)
+
+    def close(self) -> None:
+        with self._lock:
+            released = [self._remove_locked(key) for key in list(self._lru)]
+        self._release(released)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            attachments = len(self._lru)
+            payloads = [blob.payload for blob in self._blobs.values()]
+            shared = sum(1 for blob in self._blobs.values() if blob.refs > 1)
+            chats = len(self._chat_bytes)
+            logical_bytes = sum(self._chat_bytes.values())
+            evictions = self._evictions
+            dedup_hits = self._dedup_hits
+        spilled = [p for p in payloads if p.spilled]
+        renditions = [r for r in (p.rendition for p in payloads) if r is not None]
+        stored_bytes = sum(p.stored_bytes for p in payloads)
+        return {
+            "attachments": attachments,
+            "blobs": len(payloads),
+            "shared_blobs": shared,
+            "chats": chats,
+            # Renditions stay in memory even when their original is spilled.
+            "resident_bytes": stored_bytes - sum(p.size for p in spilled),
+            "spilled_bytes": sum(p.size for p in spilled),
+            "spilled_blobs": len(spilled),
+            "logical_bytes": logical_bytes,
+            "deduplicated_bytes": logical_bytes - stored_bytes,
+            "dedup_hits": dedup_hits,
+            "renditions": len(renditions),
+            "rendition_bytes": sum(r.size for r in renditions),
+            "evictions": evictions,
+            "chat_quota_bytes": self.chat_quota_bytes,
+            "total_quota_bytes": self.total_quota_bytes,
+        }
+
+
+class SpillingAttachmentStore(AttachmentStore):
+    """Keeps small attachments in memory and spills large or cold ones to temp files.
+
+    Blobs above ``spill_threshold_bytes`` are written to disk on arrival; when resident
+    bytes exceed ``memory_budget_bytes``, the least-recently-used resident blobs are
+    spilled too. Spilled blobs are served through mmap.
+    """
+
+    def __init__(
+        self,
+        *,
+        chat_quota_bytes: int,
+        total_quota_bytes: int,
+        spill_threshold_bytes: int,
+        memory_budget_bytes: int,
+        spill_dir: str | None = None,
+    ) -> None:
+        super().__init__(chat_quota_bytes=chat_quota_bytes, total_quota_bytes=total_quota_bytes)
+        self.spill_threshold_bytes = spill_threshold_bytes
+        self.memory_budget_bytes = memory_budget_bytes
+        self.spill_dir = tempfile.mkdtemp(prefix="voice-rag-attachments-", dir=spill_dir or None)
+
+    def open_writer(self, *, max_bytes: int) -> AttachmentWriter:
+        # Large uploads go straight to their spill file instead of through memory.
+        return AttachmentWriter(
+            max_bytes=max_bytes, spill_threshold_bytes=self.spill_threshold_bytes, spill_dir=self.spill_dir
+        )
+
+    def _prepare(self, attachment: ChatAttachment) -> None:
+        super()._prepare(attachment)
+        if attachment.size > self.spill_threshold_bytes:
+            attachment.payload.spill(self.spill_dir)
+
+    def _after_add(self) -> None:
+        with self._lock:
+            # A blob is as recent as its most recently used attachment.
+            last_use: Dict[str, int] = {}
+            for position, attachment in enumerate(self._lru.values()):
+                last_use[attachment.payload.sha256] = position
+            resident = [
+                blob.payload
+                for sha256, blob in sorted(self._blobs.items(), key=lambda item: last_use.get(item[0], -1))
+                if not blob.payload.spilled
+            ]
+            # Renditions are always resident; only originals can be spilled to make room.
+            rendition_bytes = sum(blob.payload.stored_bytes - blob.payload.size for blob in self._blobs.values())
+        excess = sum(p.size for p in resident) + rendition_bytes - self.memory_budget_bytes
+        for payload in resident:
+            if excess <= 0:
+                break
+            payload.spill(self.spill_dir)
+            excess -= payload.size
+            with self._lock:
+                blob = self._blobs.get(payload.sha256)
+                gone = blob is None or blob.payload is not payload
+            if gone:
+                # Released while we were writing it out.
+                payload.release()
+
+    def close(self) -> None:
+        super().close()
+        shutil.rmtree(self.spill_dir, ignore_errors=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **super().stats(),
+            "spill_threshold_bytes": self.spill_threshold_bytes,
+            "memory_budget_bytes": self.memory_budget_bytes,
+        }
+
+
+def create_attachment_store(backend: str) -> AttachmentStore:
+    chat_quota = settings.ATTACHMENT_CHAT_QUOTA_MB * _MB
+    total_quota = settings.ATTACHMENT_TOTAL_QUOTA_MB * _MB
+    if backend == "memory":
+        return AttachmentStore(chat_quota_bytes=chat_quota, total_quota_bytes=total_quota)
+    if backend == "spill":
+        return SpillingAttachmentStore(
+            chat_quota_bytes=chat_quota,
+            total_quota_bytes=total_quota,
+            spill_threshold_bytes=settings.ATTACHMENT_SPILL_THRESHOLD_MB * _MB,
+            memory_budget_bytes=settings.ATTACHMENT_MEMORY_MAX_MB * _MB,
+            spill_dir=settings.ATTACHMENT_SPILL_DIR,
+        )
+    raise ValueError(f"Unknown ATTACHMENT_STORE '{backend}' (expected 'spill' or 'memory')")
@@ -0,0 +1,86 @@
+import logging
+import threading
+from typing import Any, Dict, Literal
+
+import boto3
+from botocore.config import Config
+
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+Workload = Literal["rag", "web", "embeddings", "multimodal"]
+
+
+def _workload_configs() -> Dict[str, Config]:
+    common = dict(
+        max_pool_connections=settings.BEDROCK_MAX_POOL_CONNECTIONS,
+        tcp_keepalive=True,
+        connect_timeout=settings.BEDROCK_CONNECT_TIMEOUT_S,
+        # Single attempt: botocore retries would hide throttles from the AIMD limiter and
+        # circuit breaker in call_bedrock (and inflate its latency baseline). The embedding
+        # engine retries with jitter itself; the voice tools fall back instead.
+        retries={"mode": "standard", "total_max_attempts": 1},
+    )
+    return {
+        # Short: synthesis sits inside a spoken turn, fail fast and fall back.
+        "rag": Config(read_timeout=settings.BEDROCK_TIMEOUT_RAG_S, **common),
+        "web": Config(read_timeout=settings.BEDROCK_TIMEOUT_WEB_S, **common),
+        "embeddings": Config(
+            read_timeout=settings.BEDROCK_TIMEOUT_EMBED_S,
+            **{**common, "max_pool_connections": max(common["max_pool_connections"], settings.EMBED_MAX_CONCURRENCY)},
+        ),
+        # Long: video understanding can take minutes.
+        "multimodal": Config(read_timeout=settings.BEDROCK_TIMEOUT_VIDEO_S, **common),
+    }
+
+
+class BedrockClientFactory:
+    """Process-wide `bedrock-runtime` clients, one per workload.
+
+    boto3 clients are thread-safe, so every session and tool shares them and reuses
+    their keep-alive connection pools instead of building clients (and doing TLS
+    handshakes) per voice session.
+    """
+
+    def __init__(self, session: boto3.Session) -> None:
+        self.session = session
+        self._lock = threading.Lock()
+        self._configs = _workload_configs()
+        self._clients: Dict[str, Any] = {}
+
+    def get(self, workload: Workload):
+        with self._lock:
+            client = self._clients.get(workload)
+            if client is None:
+                client = self.session.client(
+                    "bedrock-runtime", region_name=settings.AWS_REGION, config=self._configs[workload]
+                )
+                self._clients[workload] = client
+                logger.info(f"Bedrock client created for workload '{workload}'.")
+            return client
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Per-workload connection counts read from the underlying urllib3 pools."""
+        with self._lock:
+            clients = dict(self._clients)
+        report: Dict[str, Dict[str, int]] = {}
+        for workload, client in clients.items():
+            opened = requests = idle = 0
+            try:
+                manager = client._endpoint.http_session._manager
+                for key in manager.pools.keys():
+                    pool = manager.pools[key]
+                    opened += pool.num_connections
+                    requests += pool.num_requests
+                    idle += sum(1 for conn in list(pool.pool.queue) if conn is not None)
+            except Exception:
+                # Private botocore/urllib3 internals; report what we have.
+                pass
+            report[workload] = {
+                "connections_opened": opened,
+                "connections_idle": idle,
+                "requests": requests,
+                "requests_on_reused_connections": max(0, requests - opened),
+            }
+        return report
@@ -22,17 +22,91 @@ class Settings:
     # Defaults mirror AWS docs: grounding is currently US-region only and may require a "us." model prefix.
     NOVA_GROUNDING_MODEL_ID: str = os.getenv("NOVA_GROUNDING_MODEL_ID", "us.amazon.nova-2-lite-v1:0")
     TITAN_EMBED_MODEL_ID: str = "amazon.titan-embed-text-v2:0"
+    TITAN_EMBED_DIMENSIONS: int = int(os.getenv("TITAN_EMBED_DIMENSIONS", "1024"))
+
+    # Embedding engine (bounded concurrent fan-out to Titan)
+    EMBED_MAX_CONCURRENCY: int = int(os.getenv("EMBED_MAX_CONCURRENCY", "8"))
+    EMBED_MAX_RETRIES: int = int(os.getenv("EMBED_MAX_RETRIES", "5"))
+    EMBED_BACKOFF_BASE_S: float = float(os.getenv("EMBED_BACKOFF_BASE_S", "0.25"))
+    EMBED_BACKOFF_MAX_S: float = float(os.getenv("EMBED_BACKOFF_MAX_S", "8.0"))
+
+    # Query embedding micro-batching (coalesces concurrent retrievals across sessions)
+    QUERY_EMBED_BATCH_WINDOW_MS: float = float(os.getenv("QUERY_EMBED_BATCH_WINDOW_MS", "5"))
+    QUERY_EMBED_MAX_BATCH: int = int(os.getenv("QUERY_EMBED_MAX_BATCH", "32"))
+    QUERY_EMBED_MAX_CONCURRENCY: int = int(os.getenv("QUERY_EMBED_MAX_CONCURRENCY", "8"))
+
+    # RAG answer cache (per chat, keyed by corpus version and normalized query)
+    RAG_ANSWER_CACHE_ENABLED: bool = os.getenv("RAG_ANSWER_CACHE_ENABLED", "1").lower() not in {"0", "false", "no"}
+    RAG_ANSWER_CACHE_TTL_S: float = float(os.getenv("RAG_ANSWER_CACHE_TTL_S", "600"))
+    RAG_ANSWER_CACHE_MAX_ENTRIES: int = int(os.getenv("RAG_ANSWER_CACHE_MAX_ENTRIES", "1024"))
+
+    # Speculative retrieval from final user transcripts (opt-in), reused by the RAG tool
+    RAG_PREFETCH_ENABLED: bool = os.getenv("RAG_PREFETCH_ENABLED", "0").lower() not in {"0", "false", "no"}
+    RAG_PREFETCH_TTL_S: float = float(os.getenv("RAG_PREFETCH_TTL_S", "15"))
+    RAG_PREFETCH_MIN_WORDS: int = int(os.getenv("RAG_PREFETCH_MIN_WORDS", "3"))
+    RAG_PREFETCH_MATCH_THRESHOLD: float = float(os.getenv("RAG_PREFETCH_MATCH_THRESHOLD", "0.6"))
+
+    # Persistent embedding cache (content-addressed, shared across chats)
+    EMBED_CACHE_ENABLED: bool = os.getenv("EMBED_CACHE_ENABLED", "1").lower() not in {"0", "false", "no"}
+    EMBED_CACHE_PATH: str = os.getenv("EMBED_CACHE_PATH", str(BASE_DIR / "embedding_cache.sqlite3"))
+    EMBED_CACHE_MAX_ENTRIES: int = int(os.getenv("EMBED_CACHE_MAX_ENTRIES", "200000"))
+
+    # Shared Bedrock clients (one per workload, keep-alive connection pools)
+    BEDROCK_MAX_POOL_CONNECTIONS: int = int(os.getenv("BEDROCK_MAX_POOL_CONNECTIONS", "50"))
+    BEDROCK_CONNECT_TIMEOUT_S: int = int(os.getenv("BEDROCK_CONNECT_TIMEOUT_S", "5"))
+    BEDROCK_TIMEOUT_RAG_S: int = int(os.getenv("BEDROCK_TIMEOUT_RAG_S", "20"))
+    BEDROCK_TIMEOUT_WEB_S: int = int(os.getenv("BEDROCK_TIMEOUT_WEB_S", "60"))
+    BEDROCK_TIMEOUT_EMBED_S: int = int(os.getenv("BEDROCK_TIMEOUT_EMBED_S", "30"))
+    BEDROCK_TIMEOUT_VIDEO_S: int = int(os.getenv("BEDROCK_TIMEOUT_VIDEO_S", "3600"))
+
+    # Per-model adaptive concurrency (AIMD) and circuit breaker around every Bedrock call
+    LIMITER_INITIAL: int = int(os.getenv("LIMITER_INITIAL", "8"))
+    LIMITER_MIN: int = int(os.getenv("LIMITER_MIN", "1"))
+    LIMITER_MAX: int = int(os.getenv("LIMITER_MAX", "64"))
+    LIMITER_BACKOFF_RATIO: float = float(os.getenv("LIMITER_BACKOFF_RATIO", "0.5"))
+    LIMITER_LATENCY_TOLERANCE: float = float(os.getenv("LIMITER_LATENCY_TOLERANCE", "3.0"))
+    LIMITER_ACQUIRE_TIMEOUT_S: float = float(os.getenv("LIMITER_ACQUIRE_TIMEOUT_S", "30"))
+    # Interactive calls are admitted ahead of bulk (ingest) calls; bulk keeps at least this share of slots.
+    BULK_MIN_SHARE: float = float(os.getenv("BULK_MIN_SHARE", "0.2"))
+    LIMITER_BULK_ACQUIRE_TIMEOUT_S: float = float(os.getenv("LIMITER_BULK_ACQUIRE_TIMEOUT_S", "300"))
+    BREAKER_FAILURE_THRESHOLD: int = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+    BREAKER_OPEN_S: float = float(os.getenv("BREAKER_OPEN_S", "30"))
 
     # Web search behavior
-    # - "auto": try nova_grounding, then fall back to DDGS+Nova Lite synthesis
+    # - "auto": prefer nova_grounding, with DDGS+Nova Lite synthesis hedged behind it
     # - "grounding": only nova_grounding (no external web calls)
     # - "ddgs": only DDGS+Nova Lite synthesis
     WEB_SEARCH_BACKEND: str = os.getenv("WEB_SEARCH_BACKEND", "auto").lower()
     WEB_SEARCH_MAX_SOURCES: int = int(os.getenv("WEB_SEARCH_MAX_SOURCES", "3"))
+    # "auto" only: seconds after grounding starts before DDGS is started in parallel (0 = together, <0 = sequential)
+    WEB_SEARCH_HEDGE_DELAY_S: float = float(os.getenv("WEB_SEARCH_HEDGE_DELAY_S", "1.5"))
+    # Process-wide web search caches (0 disables); concurrent identical queries always share one call
+    WEB_CACHE_ANSWER_TTL_S: float = float(os.getenv("WEB_CACHE_ANSWER_TTL_S", "300"))
+    WEB_CACHE_RESULTS_TTL_S: float = float(os.getenv("WEB_CACHE_RESULTS_TTL_S", "900"))
+    WEB_CACHE_MAX_ENTRIES: int = int(os.getenv("WEB_CACHE_MAX_ENTRIES", "512"))
+
+    # Tool answer synthesis: stream and hand the answer back once the first sentence (or word budget) is in
+    SYNTHESIS_STREAMING: bool = os.getenv("SYNTHESIS_STREAMING", "1").lower() not in {"0", "false", "no"}
+    SYNTHESIS_EARLY_RETURN: bool = os.getenv("SYNTHESIS_EARLY_RETURN", "1").lower() not in {"0", "false", "no"}
+    SYNTHESIS_EARLY_TOKENS: int = int(os.getenv("SYNTHESIS_EARLY_TOKENS", "40"))
 
     # Media uploads (in-memory per chat session)
     MEDIA_UPLOAD_MAX_MB: int = int(os.getenv("MEDIA_UPLOAD_MAX_MB", "25"))
+    MEDIA_UPLOAD_CHUNK_KB: int = int(os.getenv("MEDIA_UPLOAD_CHUNK_KB", "1024"))
     NOVA_MULTIMODAL_MODEL_ID: str = os.getenv("NOVA_MULTIMODAL_MODEL_ID", NOVA_GROUNDING_MODEL_ID)
+    # Multimodal tool results keyed by attachment hash, tool, prompt, model and inference config (0 disables)
+    MULTIMODAL_CACHE_TTL_S: float = float(os.getenv("MULTIMODAL_CACHE_TTL_S", "1800"))
+    MULTIMODAL_CACHE_MAX_ENTRIES: int = int(os.getenv("MULTIMODAL_CACHE_MAX_ENTRIES", "256"))
+    # Attachment store: "spill" writes large/cold attachments to temp files (served via mmap), "memory" never does
+    ATTACHMENT_STORE: str = os.getenv("ATTACHMENT_STORE", "spill").lower()
+    ATTACHMENT_SPILL_THRESHOLD_MB: int = int(os.getenv("ATTACHMENT_SPILL_THRESHOLD_MB", "4"))
+    ATTACHMENT_MEMORY_MAX_MB: int = int(os.getenv("ATTACHMENT_MEMORY_MAX_MB", "256"))
+    ATTACHMENT_CHAT_QUOTA_MB: int = int(os.getenv("ATTACHMENT_CHAT_QUOTA_MB", "200"))
+    ATTACHMENT_TOTAL_QUOTA_MB: int = int(os.getenv("ATTACHMENT_TOTAL_QUOTA_MB", "4096"))
+    ATTACHMENT_SPILL_DIR: str = os.getenv("ATTACHMENT_SPILL_DIR", "")
+    # Image uploads get a model-ready rendition (EXIF-upright, long edge bounded, re-encoded; 0 disables; needs Pillow)
+    IMAGE_RENDITION_MAX_EDGE: int = int(os.getenv("IMAGE_RENDITION_MAX_EDGE", "1568"))
+    IMAGE_RENDITION_QUALITY: int = int(os.getenv("IMAGE_RENDITION_QUALITY", "85"))
     
     # Audio
     INPUT_SAMPLE_RATE: int = 16000
@@ -41,10 +115,46 @@ class Settings:
     VOICE_ID: str = "matthew"
     
     # Vector DB
+    # - "chroma": one persistent on-disk collection shared by all chats (filtered by chat_id)
+    # - "memory": ephemeral per-chat NumPy indexes with exact cosine top-k (no disk I/O)
+    KB_BACKEND: str = os.getenv("KB_BACKEND", "chroma").lower()
+    # Chroma partitioning: "shared" (one filtered collection), "chat" (one collection per chat,
+    # dropped on clear) or "bucket" (KB_PARTITION_BUCKETS hashed collections).
+    KB_PARTITIONING: str = os.getenv("KB_PARTITIONING", "shared").lower()
+    KB_PARTITION_BUCKETS: int = int(os.getenv("KB_PARTITION_BUCKETS", "16"))
+    # When partitioned, move chunks out of the legacy shared COLLECTION_NAME at startup.
+    # Off by default: chat ids are per session, so migrated chats could never reconnect.
+    KB_MIGRATE_SHARED: bool = os.getenv("KB_MIGRATE_SHARED", "0").lower() not in {"0", "false", "no"}
     CHROMA_DB_PATH: str = str(BASE_DIR / "chroma_db")
     COLLECTION_NAME: str = "voice_rag_knowledge"
     CHUNK_SIZE: int = 1000
     CHUNK_OVERLAP: int = 200
+
+    # Hybrid retrieval: per-chat BM25 fused with dense results via reciprocal rank fusion
+    HYBRID_RETRIEVAL_ENABLED: bool = os.getenv("HYBRID_RETRIEVAL_ENABLED", "1").lower() not in {"0", "false", "no"}
+    HYBRID_CANDIDATES: int = int(os.getenv("HYBRID_CANDIDATES", "10"))
+    HYBRID_RRF_K: int = int(os.getenv("HYBRID_RRF_K", "60"))
+    HYBRID_DENSE_WEIGHT: float = float(os.getenv("HYBRID_DENSE_WEIGHT", "1.0"))
+    HYBRID_LEXICAL_WEIGHT: float = float(os.getenv("HYBRID_LEXICAL_WEIGHT", "1.0"))
+
+    # Named workload executors (blocking Bedrock/DDGS calls from async tools)
+    EXECUTOR_INTERACTIVE_WORKERS: int = int(os.getenv("EXECUTOR_INTERACTIVE_WORKERS", "16"))
+    EXECUTOR_MULTIMODAL_WORKERS: int = int(os.getenv("EXECUTOR_MULTIMODAL_WORKERS", "4"))
+    EXECUTOR_WEB_WORKERS: int = int(os.getenv("EXECUTOR_WEB_WORKERS", "8"))
+    EXECUTOR_MEDIA_WORKERS: int = int(os.getenv("EXECUTOR_MEDIA_WORKERS", "4"))
+
+    # KnowledgeBaseService async executors (retrieve/list vs. ingest vs. delete/clear)
+    KB_QUERY_WORKERS: int = int(os.getenv("KB_QUERY_WORKERS", "8"))
+    KB_INGEST_WORKERS: int = int(os.getenv("KB_INGEST_WORKERS", "2"))
+    KB_ADMIN_WORKERS: int = int(os.getenv("KB_ADMIN_WORKERS", "2"))
+
+    # Background ingestion
+    INGEST_WORKERS: int = int(os.getenv("INGEST_WORKERS", "2"))
+    INGEST_QUEUE_MAX: int = int(os.getenv("INGEST_QUEUE_MAX", "32"))
+    INGEST_BATCH_SIZE: int = int(os.getenv("INGEST_BATCH_SIZE", "64"))
+    INGEST_JOB_TTL_S: int = int(os.getenv("INGEST_JOB_TTL_S", "3600"))
+    PDF_EXTRACT_WORKERS: int = int(os.getenv("PDF_EXTRACT_WORKERS", "2"))
+    PDF_PAGES_PER_TASK: int = int(os.getenv("PDF_PAGES_PER_TASK", "8"))
     
     # Server
     HOST: str = "127.0.0.1"
@@ -0,0 +1,119 @@
+import asyncio
+import functools
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Literal
+
+from src.core.config import settings
+
+WorkloadName = Literal["interactive", "embeddings", "query_embeddings", "multimodal", "web", "retrieval", "ingest", "kb_admin", "media"]
+
+_SAMPLES = 1000
+
+
+class WorkloadExecutor:
+    """Bounded thread pool for one workload, instrumented with queue depth and wait times.
+
+    Each workload gets its own pool so slow work (e.g. video summarization) can only
+    exhaust its own threads, never those serving latency-critical voice tools.
+    """
+
+    def __init__(self, name: str, *, max_workers: int) -> None:
+        self.name = name
+        self.max_workers = max(1, max_workers)
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=f"wl-{name}")
+        self._lock = threading.Lock()
+        self._submitted = 0
+        self._started = 0
+        self._completed = 0
+        self._wait_ms: Deque[float] = deque(maxlen=_SAMPLES)
+        self._run_ms: Deque[float] = deque(maxlen=_SAMPLES)
+
+    def submit(self, fn: Callable[..., Any], /, *args: Any, **kwargs: Any) -> Future:
+        enqueued = time.perf_counter()
+
+        def timed() -> Any:
+            started = time.perf_counter()
+            with self._lock:
+                self._started += 1
+                self._wait_ms.append((started - enqueued) * 1000)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self._completed += 1
+                    self._run_ms.append((time.perf_counter() - started) * 1000)
+
+        with self._lock:
+            self._submitted += 1
+        return self._pool.submit(timed)
+
+    async def run(self, fn: Callable[..., Any], /, *args: Any, **kwargs: Any) -> Any:
+        """Awaitable equivalent of asyncio.to_thread on this workload's pool."""
+        return await asyncio.wrap_future(self.submit(functools.partial(fn, *args, **kwargs)))
+
+    @staticmethod
+    def _summary(samples: list[float]) -> Dict[str, float]:
+        if not samples:
+            return {"avg": 0.0, "p95": 0.0, "max": 0.0}
+        ordered = sorted(samples)
+        return {
+            "avg": round(sum(ordered) / len(ordered), 2),
+            "p95": round(ordered[max(0, math.ceil(len(ordered) * 0.95) - 1)], 2),
+            "max": round(ordered[-1], 2),
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            queued = self._submitted - self._started
+            running = self._started - self._completed
+            wait_ms = list(self._wait_ms)
+            run_ms = list(self._run_ms)
+            completed = self._completed
+        return {
+            "max_workers": self.max_workers,
+            "queue_depth": queued,
+            "running": running,
+            "completed": completed,
+            "wait_ms": self._summary(wait_ms),
+            "run_ms": self._summary(run_ms),
+        }
+
+
+def _worker_limits() -> Dict[str, int]:
+    return {
+        "interactive": settings.EXECUTOR_INTERACTIVE_WORKERS,
+        "embeddings": settings.EMBED_MAX_CONCURRENCY,
+        "query_embeddings": settings.QUERY_EMBED_MAX_CONCURRENCY,
+        "multimodal": settings.EXECUTOR_MULTIMODAL_WORKERS,
+        "web": settings.EXECUTOR_WEB_WORKERS,
+        "retrieval": settings.KB_QUERY_WORKERS,
+        "ingest": settings.KB_INGEST_WORKERS,
+        "kb_admin": settings.KB_ADMIN_WORKERS,
+        "media": settings.EXECUTOR_MEDIA_WORKERS,
+    }
+
+
+_executors: Dict[str, WorkloadExecutor] = {}
+_executors_lock = threading.Lock()
+
+
+def get_executor(name: WorkloadName) -> WorkloadExecutor:
+    with _executors_lock:
+        executor = _executors.get(name)
+        if executor is None:
+            executor = _executors[name] = WorkloadExecutor(name, max_workers=_worker_limits()[name])
+        return executor
+
+
+async def run_in(name: WorkloadName, fn: Callable[..., Any], /, *args: Any, **kwargs: Any) -> Any:
+    return await get_executor(name).run(fn, *args, **kwargs)
+
+
+def executor_stats() -> Dict[str, Dict[str, Any]]:
+    with _executors_lock:
+        executors = dict(_executors)
+    return {name: executor.stats() for name, executor in executors.items()}
@@ -0,0 +1,74 @@
+import io
+import logging
+import mmap
+from dataclasses import dataclass, field
+
+from src.core.config import settings
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow is a declared dependency; if it is missing anyway, tools send the original upload.
+    Image = ImageOps = None
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ImageRendition:
+    """Model-ready copy of an uploaded image: upright, long edge bounded, re-encoded."""
+
+    data: bytes = field(repr=False)
+    content_type: str
+    width: int
+    height: int
+
+    @property
+    def size(self) -> int:
+        return len(self.data)
+
+
+def check_rendition_support() -> None:
+    """Logs once, at startup, when renditions are enabled but Pillow is not installed."""
+    if Image is None and settings.IMAGE_RENDITION_MAX_EDGE > 0:
+        logger.warning("Pillow is not installed: image renditions are disabled and uploads are sent to the model as-is.")
+
+
+def make_image_rendition(data: bytes | mmap.mmap) -> ImageRendition | None:
+    """Renders ``data`` for Bedrock per IMAGE_RENDITION_MAX_EDGE / IMAGE_RENDITION_QUALITY.
+
+    Returns None when the original should be sent as-is: renditions disabled, Pillow
+    missing, an undecodable or animated image, or nothing gained (already upright,
+    within bounds and no smaller once re-encoded).
+    """
+    max_edge = settings.IMAGE_RENDITION_MAX_EDGE
+    if Image is None or max_edge <= 0:
+        return None
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            if getattr(image, "is_animated", False):
+                return None
+            # JPEG only: decode at a reduced DCT scale instead of full resolution.
+            image.draft("RGB", (max_edge, max_edge))
+            oriented = ImageOps.exif_transpose(image)
+            rotated = image.getexif().get(0x0112, 1) not in (1, None)
+            resized = max(oriented.size) > max_edge
+            if resized:
+                oriented.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+            has_alpha = oriented.mode in ("RGBA", "LA") or (oriented.mode == "P" and "transparency" in oriented.info)
+            out = io.BytesIO()
+            if has_alpha:
+                oriented.save(out, format="PNG", optimize=True)
+                content_type = "image/png"
+            else:
+                oriented.convert("RGB").save(
+                    out, format="JPEG", quality=settings.IMAGE_RENDITION_QUALITY, optimize=True
+                )
+                content_type = "image/jpeg"
+            width, height = oriented.size
+    except Exception as e:
+        logger.warning(f"Image rendition failed, the original will be used: {e}")
+        return None
+    rendition = ImageRendition(data=out.getvalue(), content_type=content_type, width=width, height=height)
+    if not resized and not rotated and rendition.size >= len(data):
+        return None
+    return rendition
@@ -0,0 +1,275 @@
+import contextlib
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, ContextManager, Deque, Dict, Iterator, Literal, Tuple
+
+from botocore.exceptions import ClientError, ConnectTimeoutError, EndpointConnectionError, ReadTimeoutError
+
+from src.core.clients import Workload
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+THROTTLING_ERROR_CODES = {
+    "ThrottlingException",
+    "TooManyRequestsException",
+    "ServiceQuotaExceededException",
+}
+# Errors that say the model is unhealthy (as opposed to a bad request); these are retryable.
+TRANSIENT_ERROR_CODES = THROTTLING_ERROR_CODES | {
+    "ServiceUnavailableException",
+    "ModelNotReadyException",
+    "ModelTimeoutException",
+    "InternalServerException",
+}
+
+BreakerState = Literal["closed", "open", "half_open"]
+# "interactive": inside a live voice turn (query embeddings, tool calls); "bulk": background ingest.
+Priority = Literal["interactive", "bulk"]
+
+
+class ModelUnavailableError(RuntimeError):
+    """Raised without calling Bedrock while a model's circuit is open or its limiter is saturated."""
+
+
+def error_code(exc: BaseException) -> str:
+    if isinstance(exc, ClientError):
+        return exc.response.get("Error", {}).get("Code", "")
+    return ""
+
+
+def is_throttling(exc: BaseException) -> bool:
+    return error_code(exc) in THROTTLING_ERROR_CODES
+
+
+def is_transient(exc: BaseException) -> bool:
+    if isinstance(exc, (ReadTimeoutError, ConnectTimeoutError, EndpointConnectionError)):
+        return True
+    return error_code(exc) in TRANSIENT_ERROR_CODES
+
+
+class AIMDLimiter:
+    """Adaptive in-flight limit: additive increase on healthy calls, multiplicative decrease on throttling.
+
+    Latency also counts as a congestion signal: a call much slower than the observed
+    baseline shrinks the limit gently instead of halving it.
+
+    Waiters are admitted by priority: queued interactive calls go ahead of queued bulk
+    calls, except that bulk is guaranteed every Nth slot (BULK_MIN_SHARE) while both
+    wait, so ingests still finish under sustained interactive load.
+    """
+
+    def __init__(self, *, initial: int, minimum: int, maximum: int) -> None:
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = float(min(max(initial, self.minimum), self.maximum))
+        self.in_flight = 0
+        self._baseline_ms: float | None = None
+        self._cond = threading.Condition()
+        self._waiting: Dict[str, Deque[object]] = {"interactive": deque(), "bulk": deque()}
+        self._interactive_streak = 0
+        share = min(max(settings.BULK_MIN_SHARE, 0.0), 1.0)
+        # Consecutive interactive admissions allowed while bulk is waiting.
+        self._max_streak = max(0, round(1 / share) - 1) if share > 0 else None
+
+    def _next_class(self) -> str | None:
+        interactive, bulk = self._waiting["interactive"], self._waiting["bulk"]
+        if interactive and bulk:
+            if self._max_streak is not None and self._interactive_streak >= self._max_streak:
+                return "bulk"
+            return "interactive"
+        if interactive:
+            return "interactive"
+        if bulk:
+            return "bulk"
+        return None
+
+    def acquire(self, timeout: float, priority: Priority = "interactive") -> bool:
+        deadline = time.monotonic() + timeout
+        ticket = object()
+        with self._cond:
+            queue = self._waiting[priority]
+            queue.append(ticket)
+            try:
+                while not (
+                    self.in_flight < int(self.limit)
+                    and self._next_class() == priority
+                    and queue[0] is ticket
+                ):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                    self._cond.wait(remaining)
+                self.in_flight += 1
+                if priority == "interactive":
+                    self._interactive_streak += 1
+                else:
+                    self._interactive_streak = 0
+                return True
+            finally:
+                queue.remove(ticket)
+                # Our departure may make another waiter the head of its class.
+                self._cond.notify_all()
+
+    def waiting(self) -> Dict[str, int]:
+        with self._cond:
+            return {name: len(queue) for name, queue in self._waiting.items()}
+
+    def release(self, *, latency_ms: float, throttled: bool) -> None:
+        with self._cond:
+            self.in_flight -= 1
+            if throttled:
+                self.limit = max(self.minimum, self.limit * settings.LIMITER_BACKOFF_RATIO)
+            else:
+                if self._baseline_ms is None:
+                    self._baseline_ms = latency_ms
+                else:
+                    # Track a slowly rising floor: quick to drop, slow to creep up.
+                    self._baseline_ms = min(latency_ms, self._baseline_ms * 0.99 + latency_ms * 0.01)
+                if latency_ms > self._baseline_ms * settings.LIMITER_LATENCY_TOLERANCE:
+                    self.limit = max(self.minimum, self.limit * 0.95)
+                else:
+                    self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+            self._cond.notify_all()
+
+
+class CircuitBreaker:
+    """Opens after consecutive transient failures, then lets a single probe through after a cool-down."""
+
+    def __init__(self, *, failure_threshold: int, open_seconds: float) -> None:
+        self.failure_threshold = max(1, failure_threshold)
+        self.open_seconds = open_seconds
+        self.state: BreakerState = "closed"
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self._opened_at >= self.open_seconds:
+                self.state = "half_open"
+                self._probe_in_flight = False
+            if self.state == "half_open" and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    logger.warning(f"Circuit opened after {self.failures} consecutive failures.")
+                self.state = "open"
+                self._opened_at = time.monotonic()
+                self._probe_in_flight = False
+
+    def record_neutral(self) -> None:
+        """A non-transient error (e.g. validation): says nothing about model health."""
+        with self._lock:
+            self._probe_in_flight = False
+
+
+class ModelGuard:
+    def __init__(self, model_id: str, workload: Workload) -> None:
+        self.model_id = model_id
+        self.workload = workload
+        self.limiter = AIMDLimiter(
+            initial=settings.LIMITER_INITIAL,
+            minimum=settings.LIMITER_MIN,
+            maximum=settings.LIMITER_MAX,
+        )
+        self.breaker = CircuitBreaker(
+            failure_threshold=settings.BREAKER_FAILURE_THRESHOLD,
+            open_seconds=settings.BREAKER_OPEN_S,
+        )
+
+    @contextlib.contextmanager
+    def admitted(self, *, priority: Priority = "interactive") -> Iterator[None]:
+        """Holds a limiter slot for the body; its outcome and duration feed the limiter and breaker.
+
+        For streaming responses the body must consume the whole stream, so mid-stream
+        throttling and errors are classified and the latency covers the full read.
+        """
+        if not self.breaker.allow():
+            raise ModelUnavailableError(f"{self.model_id} ({self.workload}) is unavailable (circuit open)")
+        timeout = settings.LIMITER_ACQUIRE_TIMEOUT_S if priority == "interactive" else settings.LIMITER_BULK_ACQUIRE_TIMEOUT_S
+        if not self.limiter.acquire(timeout, priority):
+            self.breaker.record_neutral()
+            raise ModelUnavailableError(f"{self.model_id} ({self.workload}) is saturated (limit {int(self.limiter.limit)})")
+        started = time.perf_counter()
+        throttled = False
+        try:
+            yield
+        except Exception as e:
+            throttled = is_throttling(e)
+            if is_transient(e):
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_neutral()
+            raise
+        else:
+            self.breaker.record_success()
+        finally:
+            self.limiter.release(latency_ms=(time.perf_counter() - started) * 1000, throttled=throttled)
+
+    def call(self, method: Callable[..., Any], *, priority: Priority = "interactive", **kwargs: Any) -> Any:
+        with self.admitted(priority=priority):
+            return method(**kwargs)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": round(self.limiter.limit, 2),
+            "in_flight": self.limiter.in_flight,
+            "waiting": self.limiter.waiting(),
+            "breaker": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
+        }
+
+
+# Keyed by (model id, workload): one model may serve both seconds-long voice calls and
+# minutes-long video analysis, which must not share a latency baseline or a breaker.
+_guards: Dict[Tuple[str, Workload], ModelGuard] = {}
+_guards_lock = threading.Lock()
+
+
+def get_model_guard(model_id: str, workload: Workload) -> ModelGuard:
+    with _guards_lock:
+        guard = _guards.get((model_id, workload))
+        if guard is None:
+            guard = _guards[(model_id, workload)] = ModelGuard(model_id, workload)
+        return guard
+
+
+def call_bedrock(
+    method: Callable[..., Any], *, workload: Workload, priority: Priority = "interactive", **kwargs: Any
+) -> Any:
+    """Calls a bedrock-runtime client method through its model's limiter and circuit breaker for ``workload``."""
+    return get_model_guard(kwargs["modelId"], workload).call(method, priority=priority, **kwargs)
+
+
+def bedrock_admission(
+    model_id: str, *, workload: Workload, priority: Priority = "interactive"
+) -> ContextManager[None]:
+    """Like call_bedrock, for calls whose work continues after the method returns (converse_stream)."""
+    return get_model_guard(model_id, workload).admitted(priority=priority)
+
+
+def model_guard_stats() -> Dict[str, Dict[str, Dict[str, Any]]]:
+    with _guards_lock:
+        guards = dict(_guards)
+    report: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    for (model_id, workload), guard in sorted(guards.items()):
+        report.setdefault(model_id, {})[workload] = guard.stats()
+    return report
@@ -5,36 +5,30 @@ from typing import Dict, Optional, Literal
 
 from strands.experimental.bidi import BidiAgent
 
+from src.core.attachments import AttachmentPayload, AttachmentStore, ChatAttachment, create_attachment_store
+from src.core.config import settings
+from src.core.executors import run_in
+
 
 @dataclass
 class ChatSession:
     chat_id: str
     agent: BidiAgent
     created_at: datetime
-    attachments: Dict[str, "ChatAttachment"]
-
-
-@dataclass
-class ChatAttachment:
-    attachment_id: str
-    filename: str
-    content_type: str
-    media_type: Literal["image", "video", "document", "audio", "unknown"]
-    data: bytes
-    created_at: datetime
 
 
 class SessionStore:
-    def __init__(self) -> None:
+    def __init__(self, attachments: AttachmentStore | None = None) -> None:
         self._lock = asyncio.Lock()
         self._sessions: Dict[str, ChatSession] = {}
+        # Attachment bytes live in a quota-bounded store (possibly spilled to disk), not on the session.
+        self.attachments = attachments if attachments is not None else create_attachment_store(settings.ATTACHMENT_STORE)
 
     async def add(self, chat_id: str, agent: BidiAgent) -> ChatSession:
         session = ChatSession(
             chat_id=chat_id,
             agent=agent,
             created_at=datetime.now(timezone.utc),
-            attachments={},
         )
         async with self._lock:
             self._sessions[chat_id] = session
@@ -50,7 +44,9 @@ class SessionStore:
 
     async def remove(self, chat_id: str) -> Optional[ChatSession]:
         async with self._lock:
-            return self._sessions.pop(chat_id, None)
+            session = self._sessions.pop(chat_id, None)
+        await run_in("media", self.attachments.clear_chat, chat_id)
+        return session
 
     async def add_attachment(
         self,
@@ -60,36 +56,37 @@ class SessionStore:
         filename: str,
         content_type: str,
         media_type: Literal["image", "video", "document", "audio", "unknown"],
-        data: bytes,
+        payload: AttachmentPayload,
     ) -> Optional[ChatAttachment]:
+        """Stores an attachment; raises AttachmentQuotaExceeded if it can never fit."""
         attachment = ChatAttachment(
             attachment_id=attachment_id,
             filename=filename,
             content_type=content_type,
             media_type=media_type,
-            data=data,
+            payload=payload,
             created_at=datetime.now(timezone.utc),
         )
-        async with self._lock:
-            session = self._sessions.get(chat_id)
-            if session is None:
-                return None
-            session.attachments[attachment_id] = attachment
+        if not await self.exists(chat_id):
+            payload.release()
+            return None
+        # May write a spill file and evict older attachments.
+        await run_in("media", self.attachments.add, chat_id, attachment)
+        if not await self.exists(chat_id):
+            # The session ended while we were storing; don't leak its attachment.
+            await run_in("media", self.attachments.clear_chat, chat_id)
+            return None
         return attachment
 
     async def list_attachments(self, chat_id: str) -> list[ChatAttachment]:
-        async with self._lock:
-            session = self._sessions.get(chat_id)
-            if session is None:
-                return []
-            return list(session.attachments.values())
+        if not await self.exists(chat_id):
+            return []
+        return self.attachments.list(chat_id)
 
     async def get_attachment(self, chat_id: str, attachment_id: str) -> Optional[ChatAttachment]:
-        async with self._lock:
-            session = self._sessions.get(chat_id)
-            if session is None:
-                return None
-            return session.attachments.get(attachment_id)
+        if not await self.exists(chat_id):
+            return None
+        return self.attachments.get(chat_id, attachment_id)
 
     async def get_latest_attachment(
         self,
@@ -97,22 +94,12 @@ class SessionStore:
         *,
         media_type: Literal["image", "video", "document", "audio", "unknown"] | None = None,
     ) -> Optional[ChatAttachment]:
-        async with self._lock:
-            session = self._sessions.get(chat_id)
-            if session is None or not session.attachments:
-                return None
-            attachments = list(session.attachments.values())
-            if media_type is not None:
-                attachments = [a for a in attachments if a.media_type == media_type]
-            if not attachments:
-                return None
-            attachments.sort(key=lambda a: a.created_at, reverse=True)
-            return attachments[0]
+        if not await self.exists(chat_id):
+            return None
+        return self.attachments.latest(chat_id, media_type=media_type)
 
     async def clear_attachments(self, chat_id: str) -> bool:
-        async with self._lock:
-            session = self._sessions.get(chat_id)
-            if session is None:
-                return False
-            session.attachments.clear()
-            return True
+        if not await self.exists(chat_id):
+            return False
+        await run_in("media", self.attachments.clear_chat, chat_id)
+        return True
@@ -0,0 +1,97 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Tuple
+
+from src.services.query_text import query_tokens
+
+_CONTRACTIONS = {
+    "what's": "what is",
+    "whats": "what is",
+    "who's": "who is",
+    "where's": "where is",
+    "how's": "how is",
+    "it's": "it is",
+    "that's": "that is",
+    "there's": "there is",
+    "what're": "what are",
+    "can't": "cannot",
+    "don't": "do not",
+    "doesn't": "does not",
+}
+# Words that change how a question is phrased, not what it asks about a chat's documents.
+_FILLERS = {"the", "this", "that", "a", "an", "please", "um", "uh", "hey", "so", "okay", "ok"}
+
+
+def normalize_query(query: str) -> str:
+    """Canonical form of a spoken question: "What's the PDF about?" and "what is this pdf about" match.
+
+    Symbols that distinguish technical terms are kept, so "c++" and "c#" (or "v1.2"
+    and "v12") stay different questions.
+    """
+    words = []
+    for word in query_tokens(query):
+        word = _CONTRACTIONS.get(word, word).replace("'", "")
+        words.extend(w for w in word.split() if w not in _FILLERS)
+    return " ".join(words)
+
+
+class AnswerCache:
+    """In-memory TTL + LRU cache of synthesized RAG answers.
+
+    Keys are (chat id, corpus version, normalized query). The knowledge base bumps a
+    chat's corpus version on every ingest, delete and clear, so answers computed
+    against an older corpus are never served again, even if they were stored after
+    the change.
+    """
+
+    def __init__(self, *, ttl_s: float, max_entries: int) -> None:
+        self.ttl_s = ttl_s
+        self.max_entries = max(1, max_entries)
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, int, str], Tuple[float, str]]" = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, chat_id: str, version: int, query: str) -> str | None:
+        key = (chat_id, version, normalize_query(query))
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[1]
+
+    def put(self, chat_id: str, version: int, query: str, answer: str) -> None:
+        key = (chat_id, version, normalize_query(query))
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_s, answer)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def drop_chat(self, chat_id: str) -> None:
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == chat_id]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_s": self.ttl_s,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,166 @@
+import array
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Reads record last_access in memory; the batch is written out with the next put
+# (or once this many keys are pending), not committed on every lookup.
+_ACCESS_FLUSH_KEYS = 512
+
+
+def normalize_text(text: str) -> str:
+    """Collapses whitespace so trivially re-formatted chunks share a cache entry."""
+    return " ".join(text.split())
+
+
+class EmbeddingCache:
+    """Persistent content-addressed embedding cache backed by SQLite.
+
+    Keys are sha256(model id, dimensions, normalized text), so identical chunks
+    are shared across chats and restarts. Entries are evicted least-recently-used
+    first once the cache grows beyond ``max_entries``.
+    """
+
+    def __init__(self, path: str | Path, *, max_entries: int) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max(1, max_entries)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " key TEXT PRIMARY KEY,"
+            " vector BLOB NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_access ON embeddings(last_access)")
+        self._conn.commit()
+        # Running count, so puts don't scan the table to decide whether to evict.
+        (self._entries,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        self._pending_access: Dict[str, float] = {}
+        self._closed = False
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(model_id: str, dimensions: int, text: str) -> str:
+        payload = f"{model_id}\x00{dimensions}\x00{normalize_text(text)}"
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        if not keys:
+            return {}
+        unique = list(dict.fromkeys(keys))
+        found: Dict[str, List[float]] = {}
+        with self._lock:
+            if self._closed:
+                return found
+            # Stay well below SQLite's bound-parameter limit.
+            for i in range(0, len(unique), 500):
+                batch = unique[i:i + 500]
+                placeholders = ",".join("?" for _ in batch)
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                for key, blob in rows:
+                    vector = array.array("f")
+                    vector.frombytes(blob)
+                    found[key] = vector.tolist()
+            if found:
+                now = time.time()
+                self._pending_access.update((key, now) for key in found)
+                if len(self._pending_access) >= _ACCESS_FLUSH_KEYS:
+                    self._flush_access_locked()
+                    self._conn.commit()
+            self.hits += sum(1 for k in keys if k in found)
+            self.misses += sum(1 for k in keys if k not in found)
+        return found
+
+    def put_many(self, items: Dict[str, List[float]]) -> None:
+        if not items:
+            return
+        now = time.time()
+        rows = [(key, array.array("f", vector).tobytes(), now) for key, vector in items.items()]
+        with self._lock:
+            if self._closed:
+                return
+            existing = set()
+            keys = list(items)
+            for i in range(0, len(keys), 500):
+                batch = keys[i:i + 500]
+                placeholders = ",".join("?" for _ in batch)
+                existing.update(
+                    key for (key,) in self._conn.execute(
+                        f"SELECT key FROM embeddings WHERE key IN ({placeholders})", batch
+                    )
+                )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, last_access) VALUES (?, ?, ?)", rows
+            )
+            self._entries += len(keys) - len(existing)
+            for key in keys:
+                self._pending_access.pop(key, None)
+            self._flush_access_locked()
+            self._evict_locked()
+            self._conn.commit()
+
+    def _flush_access_locked(self) -> None:
+        if not self._pending_access:
+            return
+        self._conn.executemany(
+            "UPDATE embeddings SET last_access = ? WHERE key = ?",
+            [(ts, key) for key, ts in self._pending_access.items()],
+        )
+        self._pending_access.clear()
+
+    def _evict_locked(self) -> None:
+        excess = self._entries - self.max_entries
+        if excess <= 0:
+            return
+        cursor = self._conn.execute(
+            "DELETE FROM embeddings WHERE key IN ("
+            " SELECT key FROM embeddings ORDER BY last_access ASC LIMIT ?)",
+            (excess,),
+        )
+        self._entries -= cursor.rowcount
+        self.evictions += cursor.rowcount
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": self._entries,
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def close(self) -> None:
+        """Writes pending access times and closes the connection; later lookups miss and puts are dropped."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._flush_access_locked()
+            self._conn.commit()
+            self._conn.close()
+
+
+def open_embedding_cache(path: str | Path, *, max_entries: int) -> Optional[EmbeddingCache]:
+    """Opens the cache, degrading to no caching if the file cannot be used."""
+    try:
+        return EmbeddingCache(path, max_entries=max_entries)
+    except sqlite3.Error as e:
+        logger.error(f"Embedding cache disabled ({path}): {e}")
+        return None
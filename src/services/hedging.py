@@ -0,0 +1,136 @@
+import asyncio
+import math
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_SAMPLES = 500
+
+
+class HedgeFailed(RuntimeError):
+    """Neither backend produced a usable result."""
+
+
+class HedgeStats:
+    """Per-backend outcomes of hedged calls: wins, failures, cancellations and completion latency."""
+
+    def __init__(self) -> None:
+        self.hedges = 0
+        self._backends: Dict[str, Dict[str, Any]] = {}
+
+    def _backend(self, name: str) -> Dict[str, Any]:
+        backend = self._backends.get(name)
+        if backend is None:
+            backend = self._backends[name] = {
+                "started": 0,
+                "wins": 0,
+                "failures": 0,
+                "cancelled": 0,
+                "latency_ms": deque(maxlen=_SAMPLES),
+            }
+        return backend
+
+    def started(self, name: str) -> None:
+        self._backend(name)["started"] += 1
+
+    def finished(self, name: str, *, latency_ms: float, ok: bool) -> None:
+        backend = self._backend(name)
+        backend["latency_ms"].append(latency_ms)
+        if not ok:
+            backend["failures"] += 1
+
+    def cancelled(self, name: str) -> None:
+        self._backend(name)["cancelled"] += 1
+
+    def won(self, name: str) -> None:
+        self._backend(name)["wins"] += 1
+
+    @staticmethod
+    def _summary(samples: Deque[float]) -> Dict[str, float]:
+        if not samples:
+            return {"p50": 0.0, "p95": 0.0, "max": 0.0}
+        ordered = sorted(samples)
+        return {
+            "p50": round(ordered[(len(ordered) - 1) // 2], 2),
+            "p95": round(ordered[max(0, math.ceil(len(ordered) * 0.95) - 1)], 2),
+            "max": round(ordered[-1], 2),
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hedges": self.hedges,
+            "backends": {
+                name: {
+                    "started": backend["started"],
+                    "wins": backend["wins"],
+                    "win_rate": round(backend["wins"] / self.hedges, 4) if self.hedges else 0.0,
+                    "failures": backend["failures"],
+                    "cancelled": backend["cancelled"],
+                    "latency_ms": self._summary(backend["latency_ms"]),
+                }
+                for name, backend in self._backends.items()
+            },
+        }
+
+
+async def hedge(
+    primary: tuple[str, Callable[[], Awaitable[Optional[T]]]],
+    secondary: tuple[str, Callable[[], Awaitable[Optional[T]]]],
+    *,
+    delay_s: float,
+    stats: HedgeStats,
+) -> T:
+    """Runs ``primary``, starts ``secondary`` after ``delay_s`` (or as soon as primary fails), returns the first usable result.
+
+    A result of None or an exception is unusable. If both finish together the primary
+    wins. The loser is cancelled; blocking work it already handed to a thread pool
+    finishes in the background but its result is discarded.
+    """
+    stats.hedges += 1
+    started = time.perf_counter()
+    tasks: Dict[asyncio.Task, str] = {}
+    launched: Dict[asyncio.Task, float] = {}
+    errors: list[BaseException] = []
+
+    def launch(name: str, fn: Callable[[], Awaitable[Optional[T]]]) -> None:
+        stats.started(name)
+        task = asyncio.create_task(fn())
+        tasks[task] = name
+        launched[task] = time.perf_counter()
+
+    launch(*primary)
+    secondary_started = False
+    try:
+        while tasks:
+            timeout = None if secondary_started else max(0.0, started + delay_s - time.perf_counter())
+            done, _ = await asyncio.wait(tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            now = time.perf_counter()
+            # Primary first, so it wins ties.
+            for task in sorted(done, key=lambda t: tasks[t] != primary[0]):
+                name = tasks.pop(task)
+                try:
+                    value = task.result()
+                except Exception as e:
+                    errors.append(e)
+                    value = None
+                stats.finished(name, latency_ms=(now - launched[task]) * 1000, ok=value is not None)
+                if value is not None:
+                    stats.won(name)
+                    logger.info(f"Hedged call won by '{name}' after {(now - started) * 1000:.0f}ms.")
+                    return value
+            if not secondary_started:
+                launch(*secondary)
+                secondary_started = True
+    finally:
+        for task, name in tasks.items():
+            if not task.done():
+                task.cancel()
+                stats.cancelled(name)
+    if errors:
+        raise HedgeFailed(f"All backends failed: {errors[-1]}") from errors[-1]
+    raise HedgeFailed("No backend produced a result")
@@ -0,0 +1,217 @@
+import asyncio
+import contextlib
+import logging
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Literal, Optional
+
+from src.core.config import settings
+from src.services.knowledge_base import IngestResult, KnowledgeBaseService
+
+logger = logging.getLogger(__name__)
+
+JobStatus = Literal["queued", "running", "completed", "failed", "cancelled"]
+ProgressSubscriber = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class IngestQueueFull(RuntimeError):
+    """Raised when the ingest queue is at INGEST_QUEUE_MAX."""
+
+
+class IngestCancelled(RuntimeError):
+    """Raised inside a running job once its chat has ended."""
+
+
+@dataclass
+class IngestJob:
+    job_id: str
+    chat_id: str
+    filename: str
+    kind: Literal["pdf", "text"]
+    content: bytes | None
+    replace: bool = False
+    status: JobStatus = "queued"
+    stage: str = "queued"
+    chunks_done: int = 0
+    chunks_total: int = 0
+    chunks_new: int = 0
+    chunks_reused: int = 0
+    chunks_removed: int = 0
+    error: str | None = None
+    created_at: float = field(default_factory=time.time)
+    finished_at: float | None = None
+    cancelled: bool = False
+    done: asyncio.Event = field(default_factory=asyncio.Event)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "jobId": self.job_id,
+            "chatId": self.chat_id,
+            "filename": self.filename,
+            "status": self.status,
+            "stage": self.stage,
+            "chunksDone": self.chunks_done,
+            "chunksTotal": self.chunks_total,
+            "chunksNew": self.chunks_new,
+            "chunksReused": self.chunks_reused,
+            "chunksRemoved": self.chunks_removed,
+            "error": self.error,
+        }
+
+
+class IngestJobManager:
+    """Bounded background worker pool for parse -> chunk -> embed -> write.
+
+    Routes enqueue uploads and return a job id immediately; the blocking
+    KnowledgeBaseService work runs off the event loop so live voice sockets
+    keep streaming. Progress is pushed to per-chat subscribers (the /ws socket).
+    """
+
+    def __init__(self, kb: KnowledgeBaseService, *, workers: int, queue_max: int) -> None:
+        self.kb = kb
+        self.workers = max(1, workers)
+        self._queue: asyncio.Queue[IngestJob] | None = None
+        self._queue_max = max(1, queue_max)
+        self._tasks: List[asyncio.Task] = []
+        self._jobs: Dict[str, IngestJob] = {}
+        self._subscribers: Dict[str, List[ProgressSubscriber]] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def _ensure_started(self) -> None:
+        if self._tasks:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=self._queue_max)
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        logger.info(f"Ingest workers started (workers={self.workers}, queue_max={self._queue_max}).")
+
+    async def shutdown(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            with contextlib.suppress(asyncio.CancelledError, Exception):
+                await task
+        self._tasks = []
+
+    def submit(self, *, chat_id: str, filename: str, content: bytes, replace: bool = False) -> IngestJob:
+        self._ensure_started()
+        self._prune()
+        kind: Literal["pdf", "text"] = "pdf" if filename.lower().endswith(".pdf") else "text"
+        job = IngestJob(
+            job_id=uuid.uuid4().hex,
+            chat_id=chat_id,
+            filename=filename,
+            kind=kind,
+            content=content,
+            replace=replace,
+        )
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise IngestQueueFull(f"Ingest queue full ({self._queue_max} jobs pending)")
+        self._jobs[job.job_id] = job
+        self._publish(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[IngestJob]:
+        return self._jobs.get(job_id)
+
+    def list_for_chat(self, chat_id: str) -> List[IngestJob]:
+        return [job for job in self._jobs.values() if job.chat_id == chat_id]
+
+    def subscribe(self, chat_id: str, subscriber: ProgressSubscriber) -> None:
+        self._subscribers.setdefault(chat_id, []).append(subscriber)
+
+    def unsubscribe(self, chat_id: str, subscriber: ProgressSubscriber) -> None:
+        subscribers = self._subscribers.get(chat_id, [])
+        if subscriber in subscribers:
+            subscribers.remove(subscriber)
+        if not subscribers:
+            self._subscribers.pop(chat_id, None)
+
+    async def cancel_chat(self, chat_id: str) -> None:
+        """Cancels a chat's pending jobs and waits for its running job to stop writing."""
+        running: List[IngestJob] = []
+        for job in self.list_for_chat(chat_id):
+            job.cancelled = True
+            if job.status == "running":
+                running.append(job)
+        for job in running:
+            await job.done.wait()
+        for job in self.list_for_chat(chat_id):
+            self._jobs.pop(job.job_id, None)
+
+    def _prune(self) -> None:
+        cutoff = time.time() - settings.INGEST_JOB_TTL_S
+        for job_id, job in list(self._jobs.items()):
+            if job.finished_at is not None and job.finished_at < cutoff:
+                del self._jobs[job_id]
+
+    def _publish(self, job: IngestJob) -> None:
+        self._publish_payload(job.chat_id, job.to_dict())
+
+    def _publish_payload(self, chat_id: str, payload: Dict[str, Any]) -> None:
+        for subscriber in list(self._subscribers.get(chat_id, [])):
+            task = asyncio.ensure_future(subscriber(payload))
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+    def _progress_from_thread(self, job: IngestJob) -> Callable[[str, int, int], None]:
+        def progress(stage: str, done: int, total: int) -> None:
+            if job.cancelled:
+                raise IngestCancelled(f"Chat {job.chat_id} ended")
+            job.stage = stage
+            job.chunks_done = done
+            job.chunks_total = total
+            # Snapshot now; the job keeps mutating before the loop runs the callback.
+            self._loop.call_soon_threadsafe(self._publish_payload, job.chat_id, job.to_dict())
+
+        return progress
+
+    async def _run(self, job: IngestJob) -> IngestResult:
+        progress = self._progress_from_thread(job)
+        if job.kind == "pdf":
+            return await self.kb.aingest_pdf(
+                job.content, job.filename, chat_id=job.chat_id, progress=progress, replace=job.replace
+            )
+        text = job.content.decode("utf-8", errors="ignore")
+        return await self.kb.aingest_text(
+            text,
+            chat_id=job.chat_id,
+            metadata={"filename": job.filename, "type": "text"},
+            progress=progress,
+            replace=job.replace,
+        )
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                if job.cancelled:
+                    job.status = "cancelled"
+                    continue
+                job.status = "running"
+                self._publish(job)
+                try:
+                    result = await self._run(job)
+                    job.chunks_done = job.chunks_total = result.chunks
+                    job.chunks_new = result.new
+                    job.chunks_reused = result.reused
+                    job.chunks_removed = result.removed
+                    job.status = "completed"
+                    job.stage = "completed"
+                except IngestCancelled:
+                    job.status = "cancelled"
+                    job.stage = "cancelled"
+                except Exception as e:
+                    logger.error(f"Ingest job {job.job_id} ({job.filename}) failed: {e}")
+                    job.status = "failed"
+                    job.stage = "failed"
+                    job.error = str(e)
+            finally:
+                # Release the upload buffer as soon as the job is done with it.
+                job.content = None
+                job.finished_at = time.time()
+                job.done.set()
+                self._publish(job)
+                self._queue.task_done()
@@ -1,83 +1,596 @@
 import os
 import json
+import uuid
+import hashlib
+import itertools
+import tempfile
+import asyncio
+import time
+import random
 import logging
-import boto3
-import chromadb
-import fitz
-from typing import List, Dict, Any
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import FIRST_EXCEPTION, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import List, Dict, Any, Callable, Deque, Iterable, Iterator, Optional, Tuple
+from botocore.exceptions import BotoCoreError, ClientError
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from chromadb.utils.embedding_functions import EmbeddingFunction
 from src.core.config import settings
+from src.core.clients import BedrockClientFactory
+from src.core.executors import get_executor, run_in
+from src.core.resilience import ModelUnavailableError, Priority, call_bedrock, is_transient
+from src.services import pdf_extract
+from src.services.answer_cache import AnswerCache
+from src.services.embedding_cache import EmbeddingCache, open_embedding_cache
+from src.services.lexical_index import BM25Index, reciprocal_rank_fusion
+from src.services.vector_store import Hit, VectorStore, create_vector_store
 
 logger = logging.getLogger(__name__)
 
+# progress(stage, done, total) — called from the ingest thread as chunks are indexed.
+IngestProgress = Callable[[str, int, int], None]
+
+class EmbeddingError(RuntimeError):
+    """Raised when a text could not be embedded after all retries."""
+
+
+@dataclass
+class EmbeddingBatchStats:
+    texts: int
+    seconds: float
+    retries: int
+    concurrency: int
+
+    @property
+    def texts_per_second(self) -> float:
+        return self.texts / self.seconds if self.seconds > 0 else 0.0
+
+
+@dataclass
+class IngestResult:
+    new: int = 0
+    reused: int = 0
+    removed: int = 0
+
+    @property
+    def chunks(self) -> int:
+        return self.new + self.reused
+
+
+def make_chunk_id(chat_id: str, filename: str, text: str, page: int | None = None) -> str:
+    """Deterministic chunk id: re-ingesting the same content in a chat maps to the same ids.
+
+    The page is part of the id, so text that moves to another page after an edit gets
+    a fresh chunk (re-embedding hits the embedding cache) instead of keeping a stale page.
+    """
+    key = f"{chat_id}\x00{filename}\x00{text}" if page is None else f"{chat_id}\x00{filename}\x00{page}\x00{text}"
+    digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+    return f"chunk_{digest[:32]}"
+
+
 class BedrockEmbeddingFunction(EmbeddingFunction):
-    def __init__(self, session: boto3.Session):
-        self.client = session.client("bedrock-runtime", region_name=settings.AWS_REGION)
+    def __init__(self, clients: BedrockClientFactory, cache: Optional[EmbeddingCache] = None):
+        self.concurrency = max(1, settings.EMBED_MAX_CONCURRENCY)
+        self.client = clients.get("embeddings")
         self.model_id = settings.TITAN_EMBED_MODEL_ID
+        self.dimensions = settings.TITAN_EMBED_DIMENSIONS
+        self.cache = cache
+        self._executor = get_executor("embeddings")
+        self._stats_lock = threading.Lock()
+        self.last_batch_stats: EmbeddingBatchStats | None = None
 
-    def __call__(self, input: List[str]) -> List[List[float]]:
-        embeddings = []
-        for text in input:
+    def _embed_one(
+        self, text: str, priority: Priority = "bulk", abandoned: threading.Event | None = None
+    ) -> tuple[List[float], int]:
+        """Embeds a single text, retrying throttling/transient errors with full-jitter backoff.
+
+        Stops before the next attempt once ``abandoned`` is set (its batch already failed).
+        """
+        retries = 0
+        while True:
+            if abandoned is not None and abandoned.is_set():
+                raise EmbeddingError("Embedding abandoned: another text in its batch failed")
             try:
-                response = self.client.invoke_model(
+                response = call_bedrock(
+                    self.client.invoke_model,
+                    workload="embeddings",
+                    priority=priority,
                     modelId=self.model_id,
                     contentType="application/json",
                     accept="application/json",
-                    body=json.dumps({"inputText": text})
+                    body=json.dumps({"inputText": text, "dimensions": self.dimensions})
                 )
                 response_body = json.loads(response.get("body").read())
-                embeddings.append(response_body.get("embedding"))
+                return response_body.get("embedding"), retries
+            except ClientError as e:
+                if not is_transient(e) or retries >= settings.EMBED_MAX_RETRIES:
+                    raise EmbeddingError(f"Embedding failed after {retries} retries: {e}") from e
+            except (ModelUnavailableError, BotoCoreError, ConnectionError) as e:
+                if retries >= settings.EMBED_MAX_RETRIES:
+                    raise EmbeddingError(f"Embedding failed after {retries} retries: {e}") from e
+            cap = min(settings.EMBED_BACKOFF_MAX_S, settings.EMBED_BACKOFF_BASE_S * (2 ** retries))
+            time.sleep(random.uniform(0, cap))
+            retries += 1
+
+    def __call__(self, input: List[str]) -> List[List[float]]:
+        return self.embed(input)
+
+    def embed(self, input: List[str], *, priority: Priority = "bulk") -> List[List[float]]:
+        """Embeds texts; "interactive" (query-time) calls are admitted to Bedrock ahead of queued bulk ones."""
+        if not input:
+            return []
+        if self.cache is None:
+            return self._embed_batch(input, priority)
+
+        keys = [EmbeddingCache.make_key(self.model_id, self.dimensions, text) for text in input]
+        cached = self.cache.get_many(keys)
+        # Embed each distinct missing text once, even if it repeats within the batch.
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, input):
+            if key not in cached and key not in missing:
+                missing[key] = text
+        if missing:
+            fresh = dict(zip(missing.keys(), self._embed_batch(list(missing.values()), priority)))
+            self.cache.put_many(fresh)
+            cached.update(fresh)
+        return [cached[key] for key in keys]
+
+    def _embed_batch(self, input: List[str], priority: Priority = "bulk") -> List[List[float]]:
+        if priority == "interactive":
+            # Query embeddings run on the caller's thread so they never queue behind an
+            # ingest's backlog in the embeddings pool; the limiter then admits them first.
+            return [self._embed_one(text, priority)[0] for text in input]
+        started = time.perf_counter()
+        abandoned = threading.Event()
+        # Collect futures in submission order so output order matches input regardless of completion order.
+        futures = [self._executor.submit(self._embed_one, text, priority, abandoned) for text in input]
+        done, not_done = wait(futures, return_when=FIRST_EXCEPTION)
+        failed = next((future for future in futures if future in done and future.exception() is not None), None)
+        if failed is not None:
+            # The batch, and so the ingest, has failed: stop spending Bedrock quota on the rest.
+            abandoned.set()
+            for future in not_done:
+                future.cancel()
+            raise failed.exception()
+        results = [future.result() for future in futures]
+        stats = EmbeddingBatchStats(
+            texts=len(input),
+            seconds=time.perf_counter() - started,
+            retries=sum(r for _, r in results),
+            concurrency=min(self.concurrency, len(input)),
+        )
+        with self._stats_lock:
+            self.last_batch_stats = stats
+        logger.info(
+            f"Embedded {stats.texts} texts in {stats.seconds:.2f}s "
+            f"({stats.texts_per_second:.1f}/s, concurrency={stats.concurrency}, retries={stats.retries})"
+        )
+        return [embedding for embedding, _ in results]
+
+
+class QueryEmbeddingBatcher:
+    """Coalesces query embeddings from all sessions arriving within a few milliseconds.
+
+    Titan embeds one text per request, so a window is deduplicated, checked against the
+    cache in a single lookup and fanned out over the bounded "query_embeddings" pool;
+    each caller then gets its own vector back.
+    """
+
+    def __init__(self, embedding_fn: BedrockEmbeddingFunction, *, window_ms: float, max_batch: int):
+        self.embedding_fn = embedding_fn
+        self.window_s = max(0.0, window_ms) / 1000
+        self.max_batch = max(1, max_batch)
+        self._executor = get_executor("query_embeddings")
+        self._cond = threading.Condition()
+        self._pending: List[Tuple[str, Future]] = []
+        self._thread: threading.Thread | None = None
+        self._batches = 0
+        self._requests = 0
+        self._embedded = 0
+
+    def embed(self, text: str) -> List[float]:
+        if self.window_s <= 0:
+            return self.embedding_fn.embed([text], priority="interactive")[0]
+        future: Future = Future()
+        with self._cond:
+            self._pending.append((text, future))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="query-embed-batcher", daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+        return future.result()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                deadline = time.monotonic() + self.window_s
+                while len(self._pending) < self.max_batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = self._pending[:self.max_batch]
+                del self._pending[:self.max_batch]
+            try:
+                self._dispatch(batch)
             except Exception as e:
-                logger.error(f"Embedding error: {e}")
-                embeddings.append([0.0] * 1024)
-        return embeddings
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _dispatch(self, batch: List[Tuple[str, Future]]) -> None:
+        fn = self.embedding_fn
+        waiters: Dict[str, List[Future]] = {}
+        for text, future in batch:
+            waiters.setdefault(text, []).append(future)
+        keys = {text: EmbeddingCache.make_key(fn.model_id, fn.dimensions, text) for text in waiters}
+        cached = fn.cache.get_many(list(keys.values())) if fn.cache is not None else {}
+        misses = 0
+        for text, futures in waiters.items():
+            embedding = cached.get(keys[text])
+            if embedding is not None:
+                for future in futures:
+                    future.set_result(embedding)
+                continue
+            misses += 1
+            # Resolved from the pool thread, so this loop never waits on Bedrock.
+            self._executor.submit(self._embed_and_resolve, text, keys[text], futures)
+        with self._cond:
+            self._batches += 1
+            self._requests += len(batch)
+            self._embedded += misses
+        if len(batch) > 1:
+            logger.debug(f"Query embedding batch: {len(batch)} requests, {len(waiters)} distinct, {misses} embedded")
+
+    def _embed_and_resolve(self, text: str, key: str, futures: List[Future]) -> None:
+        try:
+            embedding, _ = self.embedding_fn._embed_one(text, "interactive")
+        except Exception as e:
+            for future in futures:
+                future.set_exception(e)
+            return
+        if self.embedding_fn.cache is not None:
+            self.embedding_fn.cache.put_many({key: embedding})
+        for future in futures:
+            future.set_result(embedding)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "window_ms": self.window_s * 1000,
+                "batches": self._batches,
+                "requests": self._requests,
+                "bedrock_calls": self._embedded,
+                "avg_batch_size": round(self._requests / self._batches, 2) if self._batches else 0.0,
+                "pending": len(self._pending),
+            }
 
 class KnowledgeBaseService:
-    def __init__(self, session: boto3.Session):
-        self.embedding_fn = BedrockEmbeddingFunction(session)
-        self.chroma_client = chromadb.PersistentClient(path=settings.CHROMA_DB_PATH)
-        self.collection = self.chroma_client.get_or_create_collection(
-            name=settings.COLLECTION_NAME,
-            embedding_function=self.embedding_fn
+    def __init__(self, clients: BedrockClientFactory):
+        self.embedding_cache = (
+            open_embedding_cache(settings.EMBED_CACHE_PATH, max_entries=settings.EMBED_CACHE_MAX_ENTRIES)
+            if settings.EMBED_CACHE_ENABLED
+            else None
+        )
+        self.embedding_fn = BedrockEmbeddingFunction(clients, cache=self.embedding_cache)
+        self.query_embedder = QueryEmbeddingBatcher(
+            self.embedding_fn,
+            window_ms=settings.QUERY_EMBED_BATCH_WINDOW_MS,
+            max_batch=settings.QUERY_EMBED_MAX_BATCH,
         )
+        self.store: VectorStore = create_vector_store(settings.KB_BACKEND, embedding_function=self.embedding_fn)
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=settings.CHUNK_SIZE,
             chunk_overlap=settings.CHUNK_OVERLAP
         )
+        self._write_executor = ThreadPoolExecutor(
+            max_workers=max(1, settings.KB_INGEST_WORKERS), thread_name_prefix="kb-write"
+        )
+        self._lexical_lock = threading.Lock()
+        self._lexical_indexes: Dict[str, BM25Index] = {}
+        self._write_locks_lock = threading.Lock()
+        self._write_locks: Dict[str, threading.Lock] = {}
+        # Ingests and deletes of one document run one at a time (a replace would
+        # otherwise delete the other job's chunks as stale).
+        self._document_locks: Dict[Tuple[str, str], threading.Lock] = {}
+        # Process-wide counter, so a chat's version never repeats (not even after a clear).
+        self._corpus_lock = threading.Lock()
+        self._corpus_counter = itertools.count(1)
+        self._corpus_versions: Dict[str, int] = {}
+        self.answer_cache = (
+            AnswerCache(ttl_s=settings.RAG_ANSWER_CACHE_TTL_S, max_entries=settings.RAG_ANSWER_CACHE_MAX_ENTRIES)
+            if settings.RAG_ANSWER_CACHE_ENABLED
+            else None
+        )
+        # Spawned (not forked) workers: the parent already runs many threads.
+        self._pdf_executor = ProcessPoolExecutor(
+            max_workers=max(1, settings.PDF_EXTRACT_WORKERS), mp_context=multiprocessing.get_context("spawn")
+        )
+
+    def _max_batch_size(self) -> int:
+        # Chroma rejects add() calls above the client's max batch size.
+        return max(1, min(settings.INGEST_BATCH_SIZE, self.store.max_batch_size))
+
+    def corpus_version(self, chat_id: str) -> int:
+        """Changes whenever the chat's indexed chunks change; keys the RAG answer cache."""
+        with self._corpus_lock:
+            return self._corpus_versions.get(chat_id, 0)
+
+    def has_documents(self, chat_id: str) -> bool:
+        with self._lexical_lock:
+            index = self._lexical_indexes.get(chat_id)
+        return index is not None and len(index) > 0
+
+    def _corpus_changed(self, chat_id: str) -> None:
+        with self._corpus_lock:
+            self._corpus_versions[chat_id] = next(self._corpus_counter)
+        if self.answer_cache is not None:
+            self.answer_cache.drop_chat(chat_id)
+
+    def _chat_write_lock(self, chat_id: str) -> threading.Lock:
+        with self._write_locks_lock:
+            lock = self._write_locks.get(chat_id)
+            if lock is None:
+                lock = self._write_locks[chat_id] = threading.Lock()
+            return lock
+
+    def _document_lock(self, chat_id: str, filename: str) -> threading.Lock:
+        with self._write_locks_lock:
+            lock = self._document_locks.get((chat_id, filename))
+            if lock is None:
+                lock = self._document_locks[(chat_id, filename)] = threading.Lock()
+            return lock
+
+    def _lexical_index(self, chat_id: str) -> BM25Index:
+        with self._lexical_lock:
+            index = self._lexical_indexes.get(chat_id)
+            if index is None:
+                index = self._lexical_indexes[chat_id] = BM25Index()
+            return index
+
+    def _write_batch(
+        self,
+        ids: List[str],
+        documents: List[str],
+        metadatas: List[Dict[str, Any]],
+        embeddings: List[List[float]],
+    ) -> int:
+        """Writes the batch to the store and lexical index; returns how many chunks were actually new."""
+        written = 0
+        by_chat: Dict[str, List[int]] = {}
+        for i, metadata in enumerate(metadatas):
+            by_chat.setdefault(metadata["chat_id"], []).append(i)
+        for chat_id, positions in by_chat.items():
+            with self._chat_write_lock(chat_id):
+                # Concurrent ingests in one chat may both have missed these ids in
+                # _index_chunks; re-check under the lock so no id is written twice.
+                existing = self.store.existing_ids(chat_id, [ids[i] for i in positions])
+                positions = [i for i in positions if ids[i] not in existing]
+                if not positions:
+                    continue
+                batch = (
+                    [ids[i] for i in positions],
+                    [documents[i] for i in positions],
+                    [metadatas[i] for i in positions],
+                )
+                self.store.add(chat_id, *batch, [embeddings[i] for i in positions])
+                # Only index lexically what the store accepted, so both retrievers see the same corpus.
+                self._lexical_index(chat_id).add(*batch)
+                written += len(positions)
+            self._corpus_changed(chat_id)
+        return written
 
-    def ingest_text(self, text: str, *, chat_id: str, metadata: Dict[str, Any] | None = None) -> int:
+    def _index_chunks(
+        self,
+        chunks: Iterable[Tuple[str, Dict[str, Any]]],
+        *,
+        chat_id: str,
+        progress: IngestProgress | None = None,
+        total: int = 0,
+        replace_filename: str | None = None,
+    ) -> IngestResult:
+        """Embeds and writes chunks in size-capped batches, overlapping batch N's write with batch N+1's embedding.
+
+        At most two batches (one embedding, one being written) are held at a time, so
+        peak memory depends on the batch size rather than the document size. Chunks
+        whose content-hash id already exists in the chat are reused without embedding.
+        With ``replace_filename``, that document's chunks not produced by this ingest are
+        deleted afterwards, so an edited document only re-embeds its changed chunks.
+        """
+        batch_size = self._max_batch_size()
+        result = IngestResult()
+        seen: set[str] = set()
+        pending: Future | None = None
+        pending_ids = 0
+
+        def report() -> None:
+            if progress:
+                progress("indexing", result.new + result.reused, total)
+
+        def flush(batch: List[Tuple[str, Dict[str, Any]]]) -> None:
+            nonlocal pending, pending_ids
+            candidates: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+            for text, meta in batch:
+                chunk_id = make_chunk_id(chat_id, meta.get("filename", ""), text, meta.get("page"))
+                if chunk_id in seen or chunk_id in candidates:
+                    result.reused += 1
+                else:
+                    candidates[chunk_id] = (text, meta)
+            existing = self.store.existing_ids(chat_id, list(candidates)) if candidates else set()
+            result.reused += len(existing)
+            seen.update(candidates)
+            ids = [chunk_id for chunk_id in candidates if chunk_id not in existing]
+            documents = [candidates[chunk_id][0] for chunk_id in ids]
+            metadatas = [candidates[chunk_id][1] for chunk_id in ids]
+            embeddings = self.embedding_fn(documents) if ids else []
+            if pending is not None:
+                written = pending.result()
+                result.new += written
+                result.reused += pending_ids - written
+                pending = None
+            if ids:
+                pending = self._write_executor.submit(self._write_batch, ids, documents, metadatas, embeddings)
+                pending_ids = len(ids)
+            report()
+
+        try:
+            batch: List[Tuple[str, Dict[str, Any]]] = []
+            for chunk in chunks:
+                batch.append(chunk)
+                if len(batch) >= batch_size:
+                    flush(batch)
+                    batch = []
+            if batch:
+                flush(batch)
+        finally:
+            if pending is not None:
+                # Never leave a write running behind the caller (e.g. before clear_chat).
+                wait([pending])
+        if pending is not None:
+            written = pending.result()
+            result.new += written
+            result.reused += pending_ids - written
+            report()
+        if replace_filename is not None:
+            stale = [i for i in self.store.document_ids(chat_id, replace_filename) if i not in seen]
+            self._delete_chunks(chat_id, stale)
+            result.removed = len(stale)
+        if result.reused or result.removed:
+            logger.info(
+                f"Ingest for chat {chat_id}: {result.new} new chunks, {result.reused} reused, {result.removed} removed."
+            )
+        return result
+
+    def ingest_text(
+        self,
+        text: str,
+        *,
+        chat_id: str,
+        metadata: Dict[str, Any] | None = None,
+        progress: IngestProgress | None = None,
+        replace: bool = False,
+    ) -> IngestResult:
+        if progress:
+            progress("chunking", 0, 0)
         chunks = self.text_splitter.split_text(text)
-        ids = [f"chunk_{os.urandom(4).hex()}" for _ in range(len(chunks))]
         base_metadata = dict(metadata or {})
         base_metadata["chat_id"] = chat_id
-        metadatas = [base_metadata for _ in range(len(chunks))]
-        self.collection.add(documents=chunks, ids=ids, metadatas=metadatas)
-        return len(chunks)
+        if progress:
+            progress("indexing", 0, len(chunks))
+        with self._document_lock(chat_id, base_metadata.get("filename", "")):
+            return self._index_chunks(
+                ((chunk, base_metadata) for chunk in chunks),
+                chat_id=chat_id,
+                progress=progress,
+                total=len(chunks),
+                replace_filename=base_metadata.get("filename") if replace else None,
+            )
 
-    def ingest_pdf(self, pdf_bytes: bytes, filename: str, *, chat_id: str) -> int:
-        doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    def _iter_pdf_pages(self, pdf_bytes: bytes) -> Iterator[Tuple[int, str]]:
+        """Yields (page number, text) in order while worker processes extract pages ahead, with bounded lookahead.
+
+        The PDF is written to a temp file once; workers get its path rather than a copy
+        of the bytes per task.
+        """
+        fd, path = tempfile.mkstemp(prefix=f"voice-rag-pdf-{uuid.uuid4().hex}-", suffix=".pdf")
+        in_flight: Deque[Future] = deque()
         try:
-            full_text = "".join([page.get_text() for page in doc])
+            with os.fdopen(fd, "wb") as f:
+                f.write(pdf_bytes)
+            page_count = pdf_extract.count_pages(path)
+            step = max(1, settings.PDF_PAGES_PER_TASK)
+            ranges = [(start, start + step) for start in range(0, page_count, step)]
+            lookahead = max(1, settings.PDF_EXTRACT_WORKERS) * 2
+            for start, end in ranges:
+                in_flight.append(self._pdf_executor.submit(pdf_extract.extract_page_range, path, start, end))
+                if len(in_flight) >= lookahead:
+                    yield from in_flight.popleft().result()
+            while in_flight:
+                yield from in_flight.popleft().result()
         finally:
-            doc.close()
-        return self.ingest_text(full_text, chat_id=chat_id, metadata={"filename": filename, "type": "pdf"})
+            for future in in_flight:
+                future.cancel()
+            # Workers may still hold the document open; on POSIX that is fine after unlink.
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+    def ingest_pdf(
+        self,
+        pdf_bytes: bytes,
+        filename: str,
+        *,
+        chat_id: str,
+        progress: IngestProgress | None = None,
+        replace: bool = False,
+    ) -> IngestResult:
+        if progress:
+            progress("parsing", 0, 0)
+
+        def chunks() -> Iterator[Tuple[str, Dict[str, Any]]]:
+            for page_number, page_text in self._iter_pdf_pages(pdf_bytes):
+                page_metadata = {"filename": filename, "type": "pdf", "page": page_number, "chat_id": chat_id}
+                for chunk in self.text_splitter.split_text(page_text):
+                    yield chunk, page_metadata
+
+        # Total chunk count is unknown while streaming; progress reports chunks written so far.
+        with self._document_lock(chat_id, filename):
+            return self._index_chunks(
+                chunks(), chat_id=chat_id, progress=progress, replace_filename=filename if replace else None
+            )
+
+    def _delete_chunks(self, chat_id: str, ids: List[str]) -> None:
+        if not ids:
+            return
+        with self._chat_write_lock(chat_id):
+            self.store.delete_ids(chat_id, ids)
+            with self._lexical_lock:
+                index = self._lexical_indexes.get(chat_id)
+            if index is not None:
+                index.remove(ids)
+        self._corpus_changed(chat_id)
+
+    def delete_document(self, filename: str, *, chat_id: str) -> int:
+        """Deletes every chunk of one document in a chat; returns the number removed."""
+        with self._document_lock(chat_id, filename):
+            ids = self.store.document_ids(chat_id, filename)
+            self._delete_chunks(chat_id, ids)
+        return len(ids)
 
     def clear_chat(self, chat_id: str) -> bool:
+        with self._lexical_lock:
+            self._lexical_indexes.pop(chat_id, None)
+        with self._write_locks_lock:
+            self._write_locks.pop(chat_id, None)
+            for key in [key for key in self._document_locks if key[0] == chat_id]:
+                del self._document_locks[key]
         try:
-            self.collection.delete(where={"chat_id": chat_id})
+            self.store.clear_chat(chat_id)
             return True
         except Exception as e:
             logger.error(f"Error clearing chat '{chat_id}': {e}")
             return False
+        finally:
+            # Forget the chat entirely (a later ingest draws a fresh, never-used version).
+            with self._corpus_lock:
+                self._corpus_versions.pop(chat_id, None)
+            if self.answer_cache is not None:
+                self.answer_cache.drop_chat(chat_id)
 
     def clear_all(self):
+        with self._lexical_lock:
+            self._lexical_indexes.clear()
+        with self._corpus_lock:
+            self._corpus_versions.clear()
+        if self.answer_cache is not None:
+            self.answer_cache.clear()
         try:
-            self.chroma_client.delete_collection(name=settings.COLLECTION_NAME)
-            self.collection = self.chroma_client.get_or_create_collection(
-                name=settings.COLLECTION_NAME,
-                embedding_function=self.embedding_fn
-            )
+            self.store.clear_all()
             return True
         except Exception:
             return False
@@ -85,10 +598,9 @@ class KnowledgeBaseService:
     def list_all_documents(self, *, chat_id: str) -> List[Dict[str, Any]]:
         """List all unique documents for a given chat."""
         try:
-            results = self.collection.get(where={"chat_id": chat_id}, include=["metadatas"])
             unique_files = {}
-            for metadata in results.get("metadatas", []):
-                filename = (metadata or {}).get("filename")
+            for metadata in self.store.get_metadatas(chat_id):
+                filename = metadata.get("filename")
                 if filename:
                     unique_files[filename] = unique_files.get(filename, 0) + 1
             
@@ -97,20 +609,141 @@ class KnowledgeBaseService:
             logger.error(f"Error listing documents: {e}")
             return []
 
-    def retrieve(self, query: str, *, chat_id: str, n_results: int = 2) -> str:
-        results = self.collection.query(query_texts=[query], n_results=n_results, where={"chat_id": chat_id})
-        documents = results.get("documents", [[]])[0]
-        metadatas = results.get("metadatas", [[]])[0]
-        
-        if not documents:
+    def _dense_search(self, query: str, *, chat_id: str, n_results: int) -> List[Hit]:
+        embedding = self.query_embedder.embed(query)
+        return self.store.query(chat_id, embedding, n_results=n_results)
+
+    def _lexical_search(self, query: str, *, chat_id: str, n_results: int) -> List[Hit]:
+        with self._lexical_lock:
+            index = self._lexical_indexes.get(chat_id)
+        if index is None:
+            return []
+        return [(doc_id, text, metadata) for doc_id, text, metadata, _ in index.search(query, n_results=n_results)]
+
+    def _fuse(self, dense: List[Hit], lexical: List[Hit], *, n_results: int) -> List[Hit]:
+        if not lexical:
+            return dense[:n_results]
+        hits = {doc_id: (doc_id, text, metadata) for doc_id, text, metadata in lexical + dense}
+        fused = reciprocal_rank_fusion(
+            [
+                ([h[0] for h in dense], settings.HYBRID_DENSE_WEIGHT),
+                ([h[0] for h in lexical], settings.HYBRID_LEXICAL_WEIGHT),
+            ],
+            k=settings.HYBRID_RRF_K,
+            n_results=n_results,
+        )
+        return [hits[doc_id] for doc_id in fused]
+
+    @staticmethod
+    def _format_context(hits: List[Hit]) -> str:
+        if not hits:
             return "No relevant information found."
-        
+
         context_parts = []
-        for i in range(len(documents)):
-            filename = (metadatas[i] or {}).get("filename", "Unknown")
-            text = documents[i][:800]
+        for _, document, metadata in hits:
+            filename = metadata.get("filename", "Unknown")
+            page = metadata.get("page")
+            source = f"{filename}, page {page}" if page else filename
+            text = document[:800]
             # More robust cleaning: remove all non-ASCII printable chars
             clean_text = "".join(c for c in text if c.isprintable() and ord(c) < 128)
-            context_parts.append(f"[Source: {filename}]\n{clean_text}")
-            
+            context_parts.append(f"[Source: {source}]\n{clean_text}")
+
         return "\n---\n".join(context_parts)
+
+    def _candidate_count(self, n_results: int) -> int:
+        return max(n_results, settings.HYBRID_CANDIDATES) if settings.HYBRID_RETRIEVAL_ENABLED else n_results
+
+    def retrieve(self, query: str, *, chat_id: str, n_results: int = 2) -> str:
+        candidates = self._candidate_count(n_results)
+        dense = self._dense_search(query, chat_id=chat_id, n_results=candidates)
+        lexical = (
+            self._lexical_search(query, chat_id=chat_id, n_results=candidates)
+            if settings.HYBRID_RETRIEVAL_ENABLED
+            else []
+        )
+        return self._format_context(self._fuse(dense, lexical, n_results=n_results))
+
+    def answer_cache_stats(self) -> Dict[str, Any]:
+        if self.answer_cache is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.answer_cache.stats()}
+
+    def embedding_cache_stats(self) -> Dict[str, Any]:
+        if self.embedding_cache is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.embedding_cache.stats()}
+
+    # --- Async API: run the blocking calls above on dedicated executors ---
+    # Separate "retrieval" and "ingest" pools so bulk ingests never occupy the threads serving live retrievals.
+
+    async def aretrieve(self, query: str, *, chat_id: str, n_results: int = 2) -> str:
+        candidates = self._candidate_count(n_results)
+        dense_task = run_in("retrieval", self._dense_search, query, chat_id=chat_id, n_results=candidates)
+        if settings.HYBRID_RETRIEVAL_ENABLED:
+            # Dense and lexical retrieval run concurrently; fusion waits for both.
+            dense, lexical = await asyncio.gather(
+                dense_task,
+                run_in("retrieval", self._lexical_search, query, chat_id=chat_id, n_results=candidates),
+            )
+        else:
+            dense, lexical = await dense_task, []
+        return self._format_context(self._fuse(dense, lexical, n_results=n_results))
+
+    async def alist_documents(self, *, chat_id: str) -> List[Dict[str, Any]]:
+        return await run_in("retrieval", self.list_all_documents, chat_id=chat_id)
+
+    async def aingest_text(
+        self,
+        text: str,
+        *,
+        chat_id: str,
+        metadata: Dict[str, Any] | None = None,
+        progress: IngestProgress | None = None,
+        replace: bool = False,
+    ) -> IngestResult:
+        return await run_in(
+            "ingest",
+            self.ingest_text,
+            text,
+            chat_id=chat_id,
+            metadata=metadata,
+            progress=progress,
+            replace=replace,
+        )
+
+    async def aingest_pdf(
+        self,
+        pdf_bytes: bytes,
+        filename: str,
+        *,
+        chat_id: str,
+        progress: IngestProgress | None = None,
+        replace: bool = False,
+    ) -> IngestResult:
+        return await run_in(
+            "ingest",
+            self.ingest_pdf,
+            pdf_bytes,
+            filename,
+            chat_id=chat_id,
+            progress=progress,
+            replace=replace,
+        )
+
+    # Deletes and clears are quick; their own pool keeps them from queueing behind long ingests.
+    async def adelete_document(self, filename: str, *, chat_id: str) -> int:
+        return await run_in("kb_admin", self.delete_document, filename, chat_id=chat_id)
+
+    async def aclear_chat(self, chat_id: str) -> bool:
+        return await run_in("kb_admin", self.clear_chat, chat_id)
+
+    def close(self) -> None:
+        """Stops the PDF worker processes and write threads, then flushes and closes the embedding cache.
+
+        Called on app shutdown after ingest jobs.
+        """
+        self._pdf_executor.shutdown(wait=True, cancel_futures=True)
+        self._write_executor.shutdown(wait=True, cancel_futures=True)
+        if self.embedding_cache is not None:
+            self.embedding_cache.close()
@@ -0,0 +1,95 @@
+import math
+import re
+import threading
+from collections import Counter
+from typing import Any, Dict, List, Tuple
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9_\-./#]*[a-z0-9]|[a-z0-9]")
+_PART_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased tokens; identifiers like "INV-2024-001" are kept whole and also split into parts."""
+    tokens: List[str] = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        tokens.append(token)
+        parts = _PART_RE.findall(token)
+        if len(parts) > 1:
+            tokens.extend(parts)
+    return tokens
+
+
+class BM25Index:
+    """Incremental in-memory BM25 inverted index for one chat's chunks."""
+
+    def __init__(self, *, k1: float = 1.5, b: float = 0.75) -> None:
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._doc_len: Dict[str, int] = {}
+        self._docs: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+        self._total_len = 0
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def add(self, ids: List[str], documents: List[str], metadatas: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            for doc_id, text, metadata in zip(ids, documents, metadatas):
+                if doc_id in self._docs:
+                    self._remove_locked(doc_id)
+                counts = Counter(tokenize(text))
+                for term, tf in counts.items():
+                    self._postings.setdefault(term, {})[doc_id] = tf
+                length = sum(counts.values())
+                self._doc_len[doc_id] = length
+                self._total_len += length
+                self._docs[doc_id] = (text, metadata)
+
+    def remove(self, ids: List[str]) -> None:
+        with self._lock:
+            for doc_id in ids:
+                if doc_id in self._docs:
+                    self._remove_locked(doc_id)
+
+    def _remove_locked(self, doc_id: str) -> None:
+        text, _ = self._docs.pop(doc_id)
+        for term in set(tokenize(text)):
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self._postings[term]
+        self._total_len -= self._doc_len.pop(doc_id, 0)
+
+    def search(self, query: str, *, n_results: int) -> List[Tuple[str, str, Dict[str, Any], float]]:
+        """Returns (id, text, metadata, score) for the top BM25 matches."""
+        terms = set(tokenize(query))
+        with self._lock:
+            n_docs = len(self._docs)
+            if not n_docs or not terms:
+                return []
+            avg_len = self._total_len / n_docs
+            scores: Dict[str, float] = {}
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, tf in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self._doc_len[doc_id] / avg_len)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+            top = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:n_results]
+            return [(doc_id, *self._docs[doc_id], score) for doc_id, score in top]
+
+
+def reciprocal_rank_fusion(
+    rankings: List[Tuple[List[str], float]], *, k: int, n_results: int
+) -> List[str]:
+    """Fuses ranked id lists given as (ids, weight): score(id) = sum(weight / (k + rank))."""
+    scores: Dict[str, float] = {}
+    for ids, weight in rankings:
+        for rank, doc_id in enumerate(ids, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + weight / (k + rank)
+    return [doc_id for doc_id, _ in sorted(scores.items(), key=lambda item: item[1], reverse=True)[:n_results]]
@@ -0,0 +1,18 @@
+import fitz
+from typing import List, Tuple
+
+# Kept free of heavy imports: this module is loaded by every PDF worker process.
+# Workers receive a file path, never the PDF bytes. Each task opens and closes the
+# document itself (the open is amortized over PDF_PAGES_PER_TASK pages), so no worker
+# keeps a file handle or pages of a finished ingest alive.
+
+
+def count_pages(path: str) -> int:
+    with fitz.open(path, filetype="pdf") as doc:
+        return doc.page_count
+
+
+def extract_page_range(path: str, start: int, end: int) -> List[Tuple[int, str]]:
+    """Returns (1-based page number, text) for pages [start, end) of the PDF at ``path``."""
+    with fitz.open(path, filetype="pdf") as doc:
+        return [(i + 1, doc[i].get_text()) for i in range(start, min(end, doc.page_count))]
@@ -0,0 +1,118 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict
+
+from src.core.config import settings
+from src.services.answer_cache import normalize_query
+from src.services.knowledge_base import KnowledgeBaseService
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Prefetch:
+    transcript_terms: frozenset[str]
+    version: int
+    created_at: float
+    task: asyncio.Task
+    expiry: asyncio.TimerHandle | None = field(default=None, repr=False)
+
+
+class RetrievalPrefetcher:
+    """Starts retrieval for a chat's latest final user transcript before the model decides to call the RAG tool.
+
+    One prefetch per chat. A new transcript cancels the previous prefetch, and an
+    unused prefetch is cancelled after RAG_PREFETCH_TTL_S. The RAG tool uses the
+    prefetched context only if the chat's corpus is unchanged and the tool query's
+    terms are mostly contained in the transcript. Confined to the event loop.
+    """
+
+    def __init__(self, kb: KnowledgeBaseService) -> None:
+        self.kb = kb
+        self.enabled = settings.RAG_PREFETCH_ENABLED
+        self._prefetches: Dict[str, _Prefetch] = {}
+        self._started = 0
+        self._used = 0
+        self._rejected = 0
+        self._cancelled = 0
+
+    @staticmethod
+    def _terms(text: str) -> frozenset[str]:
+        return frozenset(normalize_query(text).split())
+
+    def on_user_transcript(self, chat_id: str, text: str) -> None:
+        if not self.enabled or not self.kb.has_documents(chat_id):
+            return
+        terms = self._terms(text)
+        if len(terms) < settings.RAG_PREFETCH_MIN_WORDS:
+            return
+        self.discard(chat_id)
+        task = asyncio.create_task(self.kb.aretrieve(text, chat_id=chat_id))
+        # Retrieval errors surface (if at all) to the tool; never as "exception was never retrieved".
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        prefetch = _Prefetch(
+            transcript_terms=terms,
+            version=self.kb.corpus_version(chat_id),
+            created_at=time.monotonic(),
+            task=task,
+        )
+        prefetch.expiry = asyncio.get_running_loop().call_later(
+            settings.RAG_PREFETCH_TTL_S, self._expire, chat_id, prefetch
+        )
+        self._prefetches[chat_id] = prefetch
+        self._started += 1
+
+    def _expire(self, chat_id: str, prefetch: _Prefetch) -> None:
+        if self._prefetches.get(chat_id) is prefetch:
+            self.discard(chat_id)
+
+    def discard(self, chat_id: str) -> None:
+        prefetch = self._prefetches.pop(chat_id, None)
+        if prefetch is None:
+            return
+        if prefetch.expiry is not None:
+            prefetch.expiry.cancel()
+        if not prefetch.task.done():
+            prefetch.task.cancel()
+            self._cancelled += 1
+
+    async def take(self, chat_id: str, query: str) -> str | None:
+        """Prefetched context for ``query``, awaiting the retrieval if it is still in flight; None if unusable."""
+        prefetch = self._prefetches.get(chat_id)
+        if prefetch is None:
+            return None
+        query_terms = self._terms(query)
+        overlap = len(query_terms & prefetch.transcript_terms) / len(query_terms) if query_terms else 0.0
+        if (
+            prefetch.version != self.kb.corpus_version(chat_id)
+            or overlap < settings.RAG_PREFETCH_MATCH_THRESHOLD
+        ):
+            self._rejected += 1
+            return None
+        try:
+            # Shielded: another tool call in the same turn may still use it.
+            context = await asyncio.shield(prefetch.task)
+        except asyncio.CancelledError:
+            if prefetch.task.cancelled():
+                # Superseded by a newer transcript while we waited.
+                return None
+            raise
+        except Exception:
+            return None
+        self._used += 1
+        logger.info(
+            f"RAG prefetch used for chat {chat_id} ({(time.monotonic() - prefetch.created_at) * 1000:.0f}ms after transcript)."
+        )
+        return context
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "active": len(self._prefetches),
+            "started": self._started,
+            "used": self._used,
+            "rejected": self._rejected,
+            "cancelled": self._cancelled,
+        }
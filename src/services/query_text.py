@@ -0,0 +1,12 @@
+import re
+from typing import List
+
+# A token is a run of word characters that may carry symbols which change its meaning:
+# "c++", "c#", "v1.2", ".net", "gpt-4", "what's". Symbols trailing a token other than
+# + and # (sentence punctuation like "docs." or "pdf?") are not part of it.
+_TOKEN_RE = re.compile(r"\.?\w(?:[\w+#.\-/']*[\w+#])?")
+
+
+def query_tokens(query: str) -> List[str]:
+    """Casefolded tokens of a query, keeping symbols that distinguish technical terms."""
+    return _TOKEN_RE.findall(query.casefold().replace("’", "'"))
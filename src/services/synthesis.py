@@ -0,0 +1,270 @@
+import asyncio
+import logging
+import math
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, InvalidStateError
+from typing import Any, Callable, Deque, Dict
+
+from src.core.clients import Workload
+from src.core.config import settings
+from src.core.executors import get_executor
+from src.core.resilience import bedrock_admission, call_bedrock
+
+logger = logging.getLogger(__name__)
+
+# End of a sentence: terminal punctuation (plus closing quotes/brackets) followed by whitespace.
+_SENTENCE_END_RE = re.compile(r"[.!?][\"')\]]*\s")
+# A "." after these does not end a sentence ("e.g. ", "Dr. ", "v1. ", "3. ", "J. ").
+_ABBREVIATIONS = {
+    "e.g", "i.e", "etc", "vs", "approx", "fig", "no", "dr", "mr", "mrs", "ms", "prof", "st", "jr", "sr", "inc", "ltd",
+}
+_NOT_A_SENTENCE_RE = re.compile(r"^(?:[a-z]|v?\d{1,2}(?:\.\d+)*)$")
+# Openers that carry no content, so the next sentence is spoken with them.
+_FILLER_RE = re.compile(
+    r"^(?:sure|certainly|of course|absolutely|okay|ok|great|no problem|alright)\b"
+    r"|\bhere(?: is|'s) (?:what|the)\b|\bi found\b|\blet me\b",
+    re.IGNORECASE,
+)
+_MIN_SENTENCE_CHARS = 20
+_MIN_SENTENCE_WORDS = 4
+_MAX_FILLER_WORDS = 8
+_SAMPLES = 500
+
+
+class PartialAnswer(str):
+    """An early-returned answer: only the first sentence (or SYNTHESIS_EARLY_TOKENS words) of the completion.
+
+    Callers must not cache it as the answer; the full text goes to ``on_complete``.
+    """
+
+
+class SynthesisStats:
+    """Per-tool time-to-first-token, time-to-return and time-to-complete of synthesis calls."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._tools: Dict[str, Dict[str, Any]] = {}
+
+    def record(self, tool: str, *, ttft_ms: float, returned_ms: float, complete_ms: float, early: bool) -> None:
+        with self._lock:
+            entry = self._tools.get(tool)
+            if entry is None:
+                entry = self._tools[tool] = {
+                    "calls": 0,
+                    "early_returns": 0,
+                    "ttft_ms": deque(maxlen=_SAMPLES),
+                    "returned_ms": deque(maxlen=_SAMPLES),
+                    "complete_ms": deque(maxlen=_SAMPLES),
+                }
+            entry["calls"] += 1
+            entry["early_returns"] += int(early)
+            entry["ttft_ms"].append(ttft_ms)
+            entry["returned_ms"].append(returned_ms)
+            entry["complete_ms"].append(complete_ms)
+
+    @staticmethod
+    def _summary(samples: Deque[float]) -> Dict[str, float]:
+        if not samples:
+            return {"p50": 0.0, "p95": 0.0, "max": 0.0}
+        ordered = sorted(samples)
+        return {
+            "p50": round(ordered[(len(ordered) - 1) // 2], 2),
+            "p95": round(ordered[max(0, math.ceil(len(ordered) * 0.95) - 1)], 2),
+            "max": round(ordered[-1], 2),
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                tool: {
+                    "calls": entry["calls"],
+                    "early_returns": entry["early_returns"],
+                    "ttft_ms": self._summary(entry["ttft_ms"]),
+                    "returned_ms": self._summary(entry["returned_ms"]),
+                    "complete_ms": self._summary(entry["complete_ms"]),
+                }
+                for tool, entry in self._tools.items()
+            }
+
+
+synthesis_stats = SynthesisStats()
+
+
+def _first_sentence_end(text: str) -> int | None:
+    """End of the first contentful sentence, skipping abbreviations, list markers and filler openers."""
+    start = 0
+    for match in _SENTENCE_END_RE.finditer(text):
+        if text[match.start()] == ".":
+            before = text[start:match.start()].split()
+            if not before:
+                continue
+            word = before[-1].lstrip("(\"'").lower()
+            if word in _ABBREVIATIONS or _NOT_A_SENTENCE_RE.match(word):
+                continue
+        sentence = text[start:match.end()].strip()
+        words = len(sentence.split())
+        if words < _MIN_SENTENCE_WORDS or (words <= _MAX_FILLER_WORDS and _FILLER_RE.search(sentence)):
+            # Too short or filler: keep it and let the next sentence end the answer.
+            start = match.end()
+            continue
+        if match.end() >= _MIN_SENTENCE_CHARS:
+            return match.end()
+    return None
+
+
+def _early_end(text: str) -> int | None:
+    """Where an early return cuts ``text``: its first sentence, or its first SYNTHESIS_EARLY_TOKENS words."""
+    end = _first_sentence_end(text)
+    budget = settings.SYNTHESIS_EARLY_TOKENS
+    if budget > 0:
+        words = list(re.finditer(r"\S+", text))
+        # More than the budget: the budget-th word is complete even mid-stream.
+        if len(words) > budget and (end is None or words[budget - 1].end() < end):
+            end = words[budget - 1].end()
+    return end
+
+
+def spoken_answer(answer: str) -> str:
+    """What a streamed synthesis of ``answer`` returns: the same early cut, so cached repeats match the first call."""
+    if not (settings.SYNTHESIS_STREAMING and settings.SYNTHESIS_EARLY_RETURN):
+        return answer
+    end = _early_end(answer)
+    return answer if end is None else PartialAnswer(answer[:end].strip())
+
+
+def _resolve(future: Future, value: str) -> None:
+    try:
+        future.set_result(value)
+    except InvalidStateError:
+        # Already answered early, or the awaiting tool call was cancelled.
+        pass
+
+
+def _stream(
+    bedrock,
+    future: Future,
+    *,
+    workload: Workload,
+    tool: str,
+    model_id: str,
+    prompt: str,
+    max_tokens: int,
+    on_complete: Callable[[str], None] | None,
+) -> None:
+    """Consumes a converse_stream response on a pool thread, resolving ``future`` as soon as the answer is usable.
+
+    Keeps draining after an early return, holding the model's admission slot until the
+    stream ends, and hands the full answer to ``on_complete``.
+    """
+    started = time.perf_counter()
+    ttft = returned = None
+    parts: list[str] = []
+    try:
+        with bedrock_admission(model_id, workload=workload):
+            response = bedrock.converse_stream(
+                modelId=model_id,
+                messages=[{"role": "user", "content": [{"text": prompt}]}],
+                inferenceConfig={"maxTokens": max_tokens, "temperature": 0},
+            )
+            for event in response["stream"]:
+                delta = event.get("contentBlockDelta", {}).get("delta", {}).get("text")
+                if not delta:
+                    continue
+                if ttft is None:
+                    ttft = time.perf_counter()
+                parts.append(delta)
+                if returned is None and settings.SYNTHESIS_EARLY_RETURN:
+                    text = "".join(parts)
+                    end = _early_end(text)
+                    if end is not None:
+                        returned = time.perf_counter()
+                        _resolve(future, PartialAnswer(text[:end].strip()))
+    except Exception as e:
+        if returned is None:
+            try:
+                future.set_exception(e)
+            except InvalidStateError:
+                pass
+        else:
+            logger.warning(f"Synthesis stream ({tool}) failed after early return: {e}")
+        return
+    completed = time.perf_counter()
+    answer = "".join(parts).strip()
+    if returned is None:
+        returned = completed
+        if not answer:
+            future.set_exception(ValueError("Synthesis returned no text"))
+            return
+        _resolve(future, answer)
+    elif on_complete is not None and answer:
+        try:
+            on_complete(answer)
+        except Exception as e:
+            logger.warning(f"Synthesis ({tool}) on_complete failed: {e}")
+    ttft = ttft if ttft is not None else completed
+    synthesis_stats.record(
+        tool,
+        ttft_ms=(ttft - started) * 1000,
+        returned_ms=(returned - started) * 1000,
+        complete_ms=(completed - started) * 1000,
+        early=returned < completed,
+    )
+    logger.info(
+        f"Synthesis ({tool}): ttft={(ttft - started) * 1000:.0f}ms "
+        f"returned={(returned - started) * 1000:.0f}ms complete={(completed - started) * 1000:.0f}ms"
+    )
+
+
+def _converse(bedrock, *, workload: Workload, tool: str, model_id: str, prompt: str, max_tokens: int) -> str:
+    started = time.perf_counter()
+    response = call_bedrock(
+        bedrock.converse,
+        workload=workload,
+        modelId=model_id,
+        messages=[{"role": "user", "content": [{"text": prompt}]}],
+        inferenceConfig={"maxTokens": max_tokens, "temperature": 0},
+    )
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    synthesis_stats.record(tool, ttft_ms=elapsed_ms, returned_ms=elapsed_ms, complete_ms=elapsed_ms, early=False)
+    return response['output']['message']['content'][0]['text']
+
+
+async def synthesize(
+    bedrock,
+    *,
+    workload: Workload,
+    tool: str,
+    model_id: str,
+    prompt: str,
+    max_tokens: int,
+    on_complete: Callable[[str], None] | None = None,
+) -> str:
+    """Single-turn text synthesis for voice tools.
+
+    With SYNTHESIS_STREAMING, returns once the first complete sentence (or
+    SYNTHESIS_EARLY_TOKENS words) has streamed in, instead of waiting for the whole
+    completion, so Nova Sonic can start speaking sooner. Such an answer is a truncated
+    PartialAnswer; the full text is later passed to ``on_complete`` on a pool thread.
+    ``workload`` selects the limiter and circuit breaker the call is admitted through.
+    """
+    executor = get_executor("interactive")
+    if not settings.SYNTHESIS_STREAMING:
+        return await executor.run(
+            _converse, bedrock, workload=workload, tool=tool, model_id=model_id, prompt=prompt, max_tokens=max_tokens
+        )
+    future: Future = Future()
+    executor.submit(
+        _stream,
+        bedrock,
+        future,
+        workload=workload,
+        tool=tool,
+        model_id=model_id,
+        prompt=prompt,
+        max_tokens=max_tokens,
+        on_complete=on_complete,
+    )
+    return await asyncio.wrap_future(future)
@@ -0,0 +1,448 @@
+import hashlib
+import logging
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Set, Tuple
+
+import numpy as np
+
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# (chunk id, text, metadata)
+Hit = Tuple[str, str, Dict[str, Any]]
+
+
+class VectorStore(ABC):
+    """Chat-scoped vector storage used by KnowledgeBaseService.
+
+    Embeddings are computed by the caller, so every backend stores and searches
+    the same Titan vectors.
+    """
+
+    max_batch_size: int = 1 << 30
+
+    @abstractmethod
+    def add(
+        self,
+        chat_id: str,
+        ids: List[str],
+        documents: List[str],
+        metadatas: List[Dict[str, Any]],
+        embeddings: List[List[float]],
+    ) -> None:
+        ...
+
+    @abstractmethod
+    def query(self, chat_id: str, embedding: List[float], *, n_results: int) -> List[Hit]:
+        ...
+
+    @abstractmethod
+    def get_metadatas(self, chat_id: str) -> List[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def existing_ids(self, chat_id: str, ids: List[str]) -> Set[str]:
+        ...
+
+    @abstractmethod
+    def document_ids(self, chat_id: str, filename: str) -> List[str]:
+        ...
+
+    @abstractmethod
+    def delete_ids(self, chat_id: str, ids: List[str]) -> None:
+        ...
+
+    @abstractmethod
+    def clear_chat(self, chat_id: str) -> None:
+        ...
+
+    @abstractmethod
+    def clear_all(self) -> None:
+        ...
+
+
+class ChromaVectorStore(VectorStore):
+    """One persistent Chroma collection shared by all chats, filtered by `chat_id` metadata."""
+
+    def __init__(self, chroma_client, *, collection_name: str, embedding_function) -> None:
+        self.chroma_client = chroma_client
+        self.collection_name = collection_name
+        self.embedding_function = embedding_function
+        self.collection = chroma_client.get_or_create_collection(
+            name=collection_name, embedding_function=embedding_function
+        )
+        try:
+            self.max_batch_size = chroma_client.get_max_batch_size()
+        except Exception:
+            pass
+
+    def add(self, chat_id, ids, documents, metadatas, embeddings) -> None:
+        self.collection.add(documents=documents, ids=ids, metadatas=metadatas, embeddings=embeddings)
+
+    def query(self, chat_id: str, embedding: List[float], *, n_results: int) -> List[Hit]:
+        results = self.collection.query(query_embeddings=[embedding], n_results=n_results, where={"chat_id": chat_id})
+        ids = results.get("ids", [[]])[0]
+        documents = results.get("documents", [[]])[0]
+        metadatas = results.get("metadatas", [[]])[0]
+        return [(ids[i], documents[i], metadatas[i] or {}) for i in range(len(documents))]
+
+    def get_metadatas(self, chat_id: str) -> List[Dict[str, Any]]:
+        results = self.collection.get(where={"chat_id": chat_id}, include=["metadatas"])
+        return [m or {} for m in results.get("metadatas", [])]
+
+    def existing_ids(self, chat_id: str, ids: List[str]) -> Set[str]:
+        return set(self.collection.get(ids=ids, include=[]).get("ids", []))
+
+    def document_ids(self, chat_id: str, filename: str) -> List[str]:
+        where = {"$and": [{"chat_id": chat_id}, {"filename": filename}]}
+        return self.collection.get(where=where, include=[]).get("ids", [])
+
+    def delete_ids(self, chat_id: str, ids: List[str]) -> None:
+        if ids:
+            self.collection.delete(ids=ids)
+
+    def clear_chat(self, chat_id: str) -> None:
+        self.collection.delete(where={"chat_id": chat_id})
+
+    def clear_all(self) -> None:
+        self.chroma_client.delete_collection(name=self.collection_name)
+        self.collection = self.chroma_client.get_or_create_collection(
+            name=self.collection_name, embedding_function=self.embedding_function
+        )
+
+
+class PartitionedChromaVectorStore(VectorStore):
+    """Chroma collections partitioned per chat (or per tenant bucket), created lazily.
+
+    Queries search a small per-partition HNSW graph instead of filtering one shared
+    graph, and clearing a chat drops its whole collection instead of leaving tombstones.
+    With ``buckets > 0`` chats are hashed into a fixed number of collections and still
+    filtered by ``chat_id`` within their bucket.
+    """
+
+    def __init__(self, chroma_client, *, base_name: str, embedding_function, buckets: int = 0) -> None:
+        self.chroma_client = chroma_client
+        self.base_name = base_name
+        self.embedding_function = embedding_function
+        self.buckets = max(0, buckets)
+        self._lock = threading.Lock()
+        self._collections: Dict[str, Any] = {}
+        try:
+            self.max_batch_size = chroma_client.get_max_batch_size()
+        except Exception:
+            pass
+
+    def _collection_name(self, chat_id: str) -> str:
+        if self.buckets:
+            bucket = int(hashlib.sha1(chat_id.encode("utf-8")).hexdigest(), 16) % self.buckets
+            return f"{self.base_name}-bucket-{bucket:04d}"
+        return f"{self.base_name}-chat-{chat_id}"
+
+    def _collection(self, chat_id: str, *, create: bool):
+        name = self._collection_name(chat_id)
+        with self._lock:
+            collection = self._collections.get(name)
+            if collection is not None:
+                return collection
+            if create:
+                collection = self.chroma_client.get_or_create_collection(
+                    name=name, embedding_function=self.embedding_function
+                )
+            else:
+                try:
+                    collection = self.chroma_client.get_collection(
+                        name=name, embedding_function=self.embedding_function
+                    )
+                except Exception:
+                    return None
+            self._collections[name] = collection
+            return collection
+
+    def _where(self, chat_id: str) -> Dict[str, Any] | None:
+        return {"chat_id": chat_id} if self.buckets else None
+
+    def add(self, chat_id, ids, documents, metadatas, embeddings) -> None:
+        self._collection(chat_id, create=True).add(
+            documents=documents, ids=ids, metadatas=metadatas, embeddings=embeddings
+        )
+
+    def query(self, chat_id: str, embedding: List[float], *, n_results: int) -> List[Hit]:
+        collection = self._collection(chat_id, create=False)
+        if collection is None:
+            return []
+        results = collection.query(query_embeddings=[embedding], n_results=n_results, where=self._where(chat_id))
+        ids = results.get("ids", [[]])[0]
+        documents = results.get("documents", [[]])[0]
+        metadatas = results.get("metadatas", [[]])[0]
+        return [(ids[i], documents[i], metadatas[i] or {}) for i in range(len(documents))]
+
+    def get_metadatas(self, chat_id: str) -> List[Dict[str, Any]]:
+        collection = self._collection(chat_id, create=False)
+        if collection is None:
+            return []
+        results = collection.get(where=self._where(chat_id), include=["metadatas"])
+        return [m or {} for m in results.get("metadatas", [])]
+
+    def existing_ids(self, chat_id: str, ids: List[str]) -> Set[str]:
+        collection = self._collection(chat_id, create=False)
+        if collection is None:
+            return set()
+        return set(collection.get(ids=ids, include=[]).get("ids", []))
+
+    def document_ids(self, chat_id: str, filename: str) -> List[str]:
+        collection = self._collection(chat_id, create=False)
+        if collection is None:
+            return []
+        where = {"$and": [{"chat_id": chat_id}, {"filename": filename}]} if self.buckets else {"filename": filename}
+        return collection.get(where=where, include=[]).get("ids", [])
+
+    def delete_ids(self, chat_id: str, ids: List[str]) -> None:
+        collection = self._collection(chat_id, create=False)
+        if collection is not None and ids:
+            collection.delete(ids=ids)
+
+    def clear_chat(self, chat_id: str) -> None:
+        if self.buckets:
+            collection = self._collection(chat_id, create=False)
+            if collection is not None:
+                collection.delete(where={"chat_id": chat_id})
+            return
+        name = self._collection_name(chat_id)
+        with self._lock:
+            self._collections.pop(name, None)
+        try:
+            self.chroma_client.delete_collection(name=name)
+        except Exception:
+            # Never created (chat had no documents).
+            pass
+
+    def clear_all(self) -> None:
+        prefix = f"{self.base_name}-"
+        with self._lock:
+            self._collections.clear()
+        for collection in self.chroma_client.list_collections():
+            name = getattr(collection, "name", collection)
+            if name.startswith(prefix):
+                self.chroma_client.delete_collection(name=name)
+
+    def report_shared(self, collection_name: str) -> None:
+        """Logs that a legacy shared collection is left in place (KB_MIGRATE_SHARED off)."""
+        try:
+            legacy = self.chroma_client.get_collection(name=collection_name)
+        except Exception:
+            return
+        logger.info(
+            f"Legacy shared collection '{collection_name}' ({legacy.count()} chunks) is left in place and not "
+            "served: chat ids are per session, so its chats cannot reconnect. Set KB_MIGRATE_SHARED=1 to move "
+            "them into partitions, or delete the collection."
+        )
+
+    def migrate_from_shared(self, collection_name: str, *, page_size: int = 1000) -> int:
+        """Copies chunks (with their stored embeddings) out of a legacy shared collection, then drops it."""
+        try:
+            legacy = self.chroma_client.get_collection(name=collection_name)
+        except Exception:
+            return 0
+        moved = 0
+        page_size = min(page_size, self.max_batch_size)
+        while True:
+            # Always read the first page: migrated rows are deleted from the legacy collection.
+            page = legacy.get(limit=page_size, include=["documents", "metadatas", "embeddings"])
+            ids = page.get("ids") or []
+            if not ids:
+                break
+            by_chat: Dict[str, List[int]] = {}
+            for i, metadata in enumerate(page["metadatas"]):
+                by_chat.setdefault((metadata or {}).get("chat_id", "unscoped"), []).append(i)
+            for chat_id, positions in by_chat.items():
+                self.add(
+                    chat_id,
+                    [ids[i] for i in positions],
+                    [page["documents"][i] for i in positions],
+                    [page["metadatas"][i] for i in positions],
+                    [list(page["embeddings"][i]) for i in positions],
+                )
+            legacy.delete(ids=ids)
+            moved += len(ids)
+        self.chroma_client.delete_collection(name=collection_name)
+        logger.info(f"Migrated {moved} chunks from shared collection '{collection_name}' into partitions.")
+        return moved
+
+
+class MemoryVectorIndex:
+    """Exact cosine top-k over one chat's vectors in a growable float32 matrix."""
+
+    def __init__(self, dimensions: int) -> None:
+        self._lock = threading.Lock()
+        self._vectors = np.empty((0, dimensions), dtype=np.float32)
+        self._size = 0
+        self._ids: List[str] = []
+        self._documents: List[str] = []
+        self._metadatas: List[Dict[str, Any]] = []
+        self._positions: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return self._size
+
+    def contains(self, ids: List[str]) -> Set[str]:
+        with self._lock:
+            return {doc_id for doc_id in ids if doc_id in self._positions}
+
+    def ids_where(self, key: str, value: Any) -> List[str]:
+        with self._lock:
+            return [self._ids[i] for i in range(self._size) if self._metadatas[i].get(key) == value]
+
+    def remove(self, ids: List[str]) -> None:
+        with self._lock:
+            for doc_id in ids:
+                position = self._positions.pop(doc_id, None)
+                if position is None:
+                    continue
+                # Swap-remove: move the last row into the hole so rows stay contiguous.
+                last = self._size - 1
+                if position != last:
+                    self._vectors[position] = self._vectors[last]
+                    self._ids[position] = self._ids[last]
+                    self._documents[position] = self._documents[last]
+                    self._metadatas[position] = self._metadatas[last]
+                    self._positions[self._ids[position]] = position
+                self._ids.pop()
+                self._documents.pop()
+                self._metadatas.pop()
+                self._size = last
+
+    def add(self, ids, documents, metadatas, embeddings) -> None:
+        """Appends rows; ids already in the index (or repeated in the batch) are skipped, as Chroma does."""
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1, norms)
+        with self._lock:
+            seen: Set[str] = set()
+            keep = []
+            for i, doc_id in enumerate(ids):
+                if doc_id not in self._positions and doc_id not in seen:
+                    seen.add(doc_id)
+                    keep.append(i)
+            if len(keep) < len(ids):
+                ids = [ids[i] for i in keep]
+                documents = [documents[i] for i in keep]
+                metadatas = [metadatas[i] for i in keep]
+                vectors = vectors[keep]
+            if not ids:
+                return
+            needed = self._size + len(vectors)
+            if needed > len(self._vectors):
+                # Amortized O(1) appends: grow capacity geometrically.
+                grown = np.empty((max(needed, 2 * len(self._vectors), 64), vectors.shape[1]), dtype=np.float32)
+                grown[: self._size] = self._vectors[: self._size]
+                self._vectors = grown
+            self._vectors[self._size : needed] = vectors
+            for offset, doc_id in enumerate(ids):
+                self._positions[doc_id] = self._size + offset
+            self._size = needed
+            self._ids.extend(ids)
+            self._documents.extend(documents)
+            self._metadatas.extend(metadatas)
+
+    def query(self, embedding: List[float], *, n_results: int) -> List[Hit]:
+        query = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+        with self._lock:
+            if self._size == 0:
+                return []
+            scores = self._vectors[: self._size] @ query
+            k = min(n_results, self._size)
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [(self._ids[i], self._documents[i], self._metadatas[i]) for i in top]
+
+    def metadatas(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._metadatas)
+
+
+class MemoryVectorStore(VectorStore):
+    """Ephemeral per-chat NumPy indexes: no disk I/O, no cross-chat filtering, O(1) disposal."""
+
+    def __init__(self, *, dimensions: int) -> None:
+        self.dimensions = dimensions
+        self._lock = threading.Lock()
+        self._indexes: Dict[str, MemoryVectorIndex] = {}
+
+    def _index(self, chat_id: str) -> MemoryVectorIndex:
+        with self._lock:
+            index = self._indexes.get(chat_id)
+            if index is None:
+                index = self._indexes[chat_id] = MemoryVectorIndex(self.dimensions)
+            return index
+
+    def add(self, chat_id, ids, documents, metadatas, embeddings) -> None:
+        self._index(chat_id).add(ids, documents, metadatas, embeddings)
+
+    def query(self, chat_id: str, embedding: List[float], *, n_results: int) -> List[Hit]:
+        with self._lock:
+            index = self._indexes.get(chat_id)
+        return index.query(embedding, n_results=n_results) if index is not None else []
+
+    def get_metadatas(self, chat_id: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            index = self._indexes.get(chat_id)
+        return index.metadatas() if index is not None else []
+
+    def existing_ids(self, chat_id: str, ids: List[str]) -> Set[str]:
+        with self._lock:
+            index = self._indexes.get(chat_id)
+        return index.contains(ids) if index is not None else set()
+
+    def document_ids(self, chat_id: str, filename: str) -> List[str]:
+        with self._lock:
+            index = self._indexes.get(chat_id)
+        return index.ids_where("filename", filename) if index is not None else []
+
+    def delete_ids(self, chat_id: str, ids: List[str]) -> None:
+        with self._lock:
+            index = self._indexes.get(chat_id)
+        if index is not None:
+            index.remove(ids)
+
+    def clear_chat(self, chat_id: str) -> None:
+        with self._lock:
+            self._indexes.pop(chat_id, None)
+
+    def clear_all(self) -> None:
+        with self._lock:
+            self._indexes.clear()
+
+
+def create_vector_store(backend: str, *, embedding_function) -> VectorStore:
+    if backend == "memory":
+        logger.info("Vector store: in-memory per-chat indexes.")
+        return MemoryVectorStore(dimensions=settings.TITAN_EMBED_DIMENSIONS)
+    if backend != "chroma":
+        logger.warning(f"Unknown KB_BACKEND '{backend}', using 'chroma'.")
+    import chromadb
+
+    chroma_client = chromadb.PersistentClient(path=settings.CHROMA_DB_PATH)
+    partitioning = settings.KB_PARTITIONING
+    if partitioning in {"chat", "bucket"}:
+        store = PartitionedChromaVectorStore(
+            chroma_client,
+            base_name=settings.COLLECTION_NAME,
+            embedding_function=embedding_function,
+            buckets=settings.KB_PARTITION_BUCKETS if partitioning == "bucket" else 0,
+        )
+        logger.info(f"Vector store: Chroma partitioned per {partitioning}.")
+        if settings.KB_MIGRATE_SHARED:
+            store.migrate_from_shared(settings.COLLECTION_NAME)
+        else:
+            store.report_shared(settings.COLLECTION_NAME)
+        return store
+    if partitioning != "shared":
+        logger.warning(f"Unknown KB_PARTITIONING '{partitioning}', using 'shared'.")
+    return ChromaVectorStore(
+        chroma_client, collection_name=settings.COLLECTION_NAME, embedding_function=embedding_function
+    )
@@ -8,9 +8,11 @@ from strands.experimental.bidi.tools import stop_conversation
 from strands_tools import calculator
 
 from src.core.config import settings
+from src.core.clients import BedrockClientFactory
 from src.core.sessions import SessionStore
 from src.core.prompts import get_system_prompt
 from src.services.knowledge_base import KnowledgeBaseService
+from src.services.prefetch import RetrievalPrefetcher
 from src.tools.rag import get_rag_tool
 from src.tools.web import get_web_search_tool
 from src.tools.multimodal import get_multimodal_tools
@@ -18,10 +20,19 @@ from src.tools.multimodal import get_multimodal_tools
 logger = logging.getLogger(__name__)
 
 class VoiceOrchestrator:
-    def __init__(self, session: boto3.Session, kb: KnowledgeBaseService, sessions: SessionStore):
+    def __init__(
+        self,
+        session: boto3.Session,
+        kb: KnowledgeBaseService,
+        sessions: SessionStore,
+        clients: BedrockClientFactory,
+        prefetcher: RetrievalPrefetcher | None = None,
+    ):
         self.session = session
+        self.clients = clients
         self.kb = kb
         self.sessions = sessions
+        self.prefetcher = prefetcher
         self.current_date = datetime.now().strftime("%A, %B %d, %Y")
 
     def create_agent(
@@ -40,10 +51,10 @@ class VoiceOrchestrator:
     ) -> BidiAgent:
         """Assembles a specialized BidiAgent instance."""
          
-        # Tools initialized with session for Nova Lite reasoning
-        search_internal_documents = get_rag_tool(self.kb, self.session, chat_id=chat_id)
-        web_search = get_web_search_tool(self.session)
-        multimodal_tools = get_multimodal_tools(self.sessions, self.session, chat_id=chat_id)
+        # Tools share the process-wide Bedrock clients for Nova Lite reasoning
+        search_internal_documents = get_rag_tool(self.kb, self.clients, chat_id=chat_id, prefetcher=self.prefetcher)
+        web_search = get_web_search_tool(self.clients)
+        multimodal_tools = get_multimodal_tools(self.sessions, self.clients, chat_id=chat_id)
 
         audio_config: dict[str, Any] = {
             "voice": voice or settings.VOICE_ID,
@@ -0,0 +1,99 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple, TypeVar
+
+from src.core.config import settings
+from src.services.query_text import query_tokens
+
+T = TypeVar("T")
+
+def normalize_web_query(query: str) -> str:
+    """Case- and punctuation-insensitive form of a search query ("C++" and "C#" stay distinct)."""
+    return " ".join(query_tokens(query))
+
+
+class SingleFlightCache:
+    """Process-wide TTL + LRU cache where concurrent misses for one key share a single computation.
+
+    Confined to the event loop (no awaits between lookup and registration), so it
+    needs no lock. The computation runs as its own task: a caller that is cancelled
+    (e.g. an interrupted voice turn) does not fail the others waiting on the same
+    key. Failures, and values rejected by the ``cacheable`` predicate, are never
+    cached. With ``ttl_s <= 0`` nothing is stored, but concurrent calls for one key
+    are still coalesced.
+    """
+
+    def __init__(self, *, ttl_s: float, max_entries: int) -> None:
+        self.ttl_s = ttl_s
+        self.max_entries = max(1, max_entries)
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._in_flight: Dict[Hashable, asyncio.Task] = {}
+        self._hits = 0
+        self._misses = 0
+        self._coalesced = 0
+
+    async def get_or_compute(
+        self,
+        key: Hashable,
+        compute: Callable[[], Awaitable[T]],
+        *,
+        cacheable: Callable[[T], bool] | None = None,
+    ) -> T:
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return entry[1]
+            del self._entries[key]
+        task = self._in_flight.get(key)
+        if task is None:
+            self._misses += 1
+            task = self._in_flight[key] = asyncio.create_task(self._fill(key, compute, cacheable))
+        else:
+            self._coalesced += 1
+        return await asyncio.shield(task)
+
+    async def _fill(
+        self, key: Hashable, compute: Callable[[], Awaitable[T]], cacheable: Callable[[T], bool] | None
+    ) -> T:
+        try:
+            value = await compute()
+            if self.ttl_s > 0 and (cacheable is None or cacheable(value)):
+                self._entries[key] = (time.monotonic() + self.ttl_s, value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            return value
+        finally:
+            self._in_flight.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._hits + self._misses + self._coalesced
+        return {
+            "entries": len(self._entries),
+            "in_flight": len(self._in_flight),
+            "ttl_s": self.ttl_s,
+            "hits": self._hits,
+            "misses": self._misses,
+            "coalesced": self._coalesced,
+            # Coalesced callers also skipped the upstream call.
+            "hit_rate": round((self._hits + self._coalesced) / lookups, 4) if lookups else 0.0,
+        }
+
+
+_caches: Dict[str, SingleFlightCache] = {}
+
+
+def get_web_cache(kind: str) -> SingleFlightCache:
+    """Shared caches: "answers" (final tool output) and "results" (raw DDGS hits)."""
+    cache = _caches.get(kind)
+    if cache is None:
+        ttl_s = settings.WEB_CACHE_ANSWER_TTL_S if kind == "answers" else settings.WEB_CACHE_RESULTS_TTL_S
+        cache = _caches[kind] = SingleFlightCache(ttl_s=ttl_s, max_entries=settings.WEB_CACHE_MAX_ENTRIES)
+    return cache
+
+
+def web_cache_stats() -> Dict[str, Dict[str, Any]]:
+    return {kind: cache.stats() for kind, cache in _caches.items()}
@@ -1,17 +1,26 @@
-import asyncio
 import json
 import logging
 from typing import Any, Literal, Optional
 
-import boto3
-from botocore.config import Config
 from strands import tool
 
 from src.core.config import settings
+from src.core.attachments import AttachmentUnavailable
+from src.core.clients import BedrockClientFactory
+from src.core.executors import run_in
+from src.core.resilience import call_bedrock
 from src.core.sessions import SessionStore, ChatAttachment
+from src.services.web_cache import SingleFlightCache
 
 logger = logging.getLogger(__name__)
 
+# Process-wide: the key starts with the attachment's content hash, so identical
+# uploads in different chats share results.
+result_cache = SingleFlightCache(
+    ttl_s=settings.MULTIMODAL_CACHE_TTL_S,
+    max_entries=settings.MULTIMODAL_CACHE_MAX_ENTRIES,
+)
+
 
 def _guess_format_from_content_type(content_type: str) -> str:
     ct = (content_type or "").lower().strip()
@@ -51,6 +60,18 @@ def _extract_text_from_converse(response: dict) -> str:
     return "".join(parts).strip()
 
 
+def _normalize_prompt(prompt: str) -> str:
+    return " ".join(prompt.split())
+
+
+def _canonical_json(text: str) -> str:
+    """Re-serializes a JSON Schema so formatting differences do not change the prompt (or its cache key)."""
+    try:
+        return json.dumps(json.loads(text), indent=2, ensure_ascii=False)
+    except ValueError:
+        return text.strip()
+
+
 async def _get_attachment(
     sessions: SessionStore,
     *,
@@ -65,20 +86,75 @@ async def _get_attachment(
     return await sessions.get_latest_attachment(chat_id)
 
 
-def get_multimodal_tools(sessions: SessionStore, session: boto3.Session, *, chat_id: str):
-    bedrock = session.client(
-        "bedrock-runtime",
-        region_name=settings.AWS_REGION,
-        config=Config(read_timeout=3600),
-    )
+def get_multimodal_tools(sessions: SessionStore, clients: BedrockClientFactory, *, chat_id: str):
+    bedrock = clients.get("multimodal")
 
     model_id = settings.NOVA_MULTIMODAL_MODEL_ID
 
+    async def _analyze(
+        tool_name: str,
+        attachment: ChatAttachment,
+        *,
+        block: Literal["image", "video"],
+        prompt: str,
+        inference_config: dict[str, Any],
+        full_resolution: bool = False,
+    ) -> str:
+        """One converse call over an attachment, served from ``result_cache`` when the same analysis ran recently.
+
+        Images are sent as their upload-time rendition unless ``full_resolution`` is set
+        (or no rendition was made).
+        """
+        rendition = None if full_resolution else attachment.rendition
+        try:
+            # Pin the bytes now: the attachment may be removed or evicted while this call awaits.
+            data = rendition.data if rendition is not None else attachment.data
+        except AttachmentUnavailable:
+            return "That attachment is no longer available. Please upload it again."
+        if rendition is not None:
+            variant, content_type = "rendition", rendition.content_type
+        else:
+            variant, content_type = "original", attachment.content_type
+        media_format = _guess_format_from_content_type(content_type)
+        key = (
+            attachment.payload.sha256,
+            variant,
+            tool_name,
+            _normalize_prompt(prompt),
+            model_id,
+            media_format,
+            json.dumps(inference_config, sort_keys=True),
+        )
+
+        async def compute() -> str:
+            response = await run_in(
+                "multimodal",
+                call_bedrock,
+                bedrock.converse,
+                workload="multimodal",
+                modelId=model_id,
+                messages=[
+                    {
+                        "role": "user",
+                        "content": [
+                            {block: {"format": media_format, "source": {"bytes": data}}},
+                            {"text": prompt},
+                        ],
+                    }
+                ],
+                inferenceConfig=inference_config,
+            )
+            return _extract_text_from_converse(response)
+
+        return await result_cache.get_or_compute(key, compute)
+
     @tool(
         name="extract_image_text",
-        description="Extracts text from the most recently uploaded IMAGE in this chat (OCR). Upload an image first in the UI.",
+        description="Extracts text from the most recently uploaded IMAGE in this chat (OCR). Upload an image first in the UI. Set full_resolution only if small print was unreadable.",
     )
-    async def extract_image_text(attachment_id: Optional[str] = None, text_formatting: str = "markdown") -> str:
+    async def extract_image_text(
+        attachment_id: Optional[str] = None, text_formatting: str = "markdown", full_resolution: bool = False
+    ) -> str:
         attachment = await _get_attachment(
             sessions,
             chat_id=chat_id,
@@ -88,7 +164,6 @@ def get_multimodal_tools(sessions: SessionStore, session: boto3.Session, *, chat
         if attachment is None:
             return "No image uploaded for this chat. Upload an image first."
 
-        img_format = _guess_format_from_content_type(attachment.content_type)
         prompt = f"""## Instructions
 Extract all information from this page using only {text_formatting} formatting. Retain the original layout and structure including lists, tables, charts and math formulae.
 
@@ -100,28 +175,21 @@ Extract all information from this page using only {text_formatting} formatting.
 5. Always wrap the entire output in ``` tags.
 """
 
-        response = await asyncio.to_thread(
-            bedrock.converse,
-            modelId=model_id,
-            messages=[
-                {
-                    "role": "user",
-                    "content": [
-                        {"image": {"format": img_format, "source": {"bytes": attachment.data}}},
-                        {"text": prompt},
-                    ],
-                }
-            ],
-            inferenceConfig={"maxTokens": 2048, "temperature": 0.7, "topP": 0.9},
+        text = await _analyze(
+            "extract_image_text",
+            attachment,
+            block="image",
+            prompt=prompt,
+            inference_config={"maxTokens": 2048, "temperature": 0.7, "topP": 0.9},
+            full_resolution=full_resolution,
         )
-        text = _extract_text_from_converse(response)
         return _strip_outer_code_fences(text)
 
     @tool(
         name="extract_image_json",
-        description="Extracts structured information from the most recently uploaded IMAGE in this chat using a JSON Schema you provide.",
+        description="Extracts structured information from the most recently uploaded IMAGE in this chat using a JSON Schema you provide. Set full_resolution only if small print was unreadable.",
     )
-    async def extract_image_json(json_schema: str, attachment_id: Optional[str] = None) -> str:
+    async def extract_image_json(json_schema: str, attachment_id: Optional[str] = None, full_resolution: bool = False) -> str:
         attachment = await _get_attachment(
             sessions,
             chat_id=chat_id,
@@ -131,7 +199,6 @@ Extract all information from this page using only {text_formatting} formatting.
         if attachment is None:
             return "No image uploaded for this chat. Upload an image first."
 
-        img_format = _guess_format_from_content_type(attachment.content_type)
         prompt = f"""Given the image representation of a document, extract information in JSON format according to the given schema.
 
 Follow these guidelines:
@@ -139,23 +206,16 @@ Follow these guidelines:
 - When instructed to read tables or lists, read each row from every page. Ensure every field in each row is populated if the document contains the field.
 
 JSON Schema:
-{json_schema}
+{_canonical_json(json_schema)}
 """
-        response = await asyncio.to_thread(
-            bedrock.converse,
-            modelId=model_id,
-            messages=[
-                {
-                    "role": "user",
-                    "content": [
-                        {"image": {"format": img_format, "source": {"bytes": attachment.data}}},
-                        {"text": prompt},
-                    ],
-                }
-            ],
-            inferenceConfig={"maxTokens": 2048, "temperature": 0},
+        text = await _analyze(
+            "extract_image_json",
+            attachment,
+            block="image",
+            prompt=prompt,
+            inference_config={"maxTokens": 2048, "temperature": 0},
+            full_resolution=full_resolution,
         )
-        text = _extract_text_from_converse(response)
         try:
             parsed = json.loads(text)
             return json.dumps(parsed, indent=2, ensure_ascii=False)
@@ -176,7 +236,6 @@ JSON Schema:
         if attachment is None:
             return "No image uploaded for this chat. Upload an image first."
 
-        img_format = _guess_format_from_content_type(attachment.content_type)
         prompt = f"""Detect all objects with their bounding boxes in the image for: {target_description}
 
 Represent bounding boxes as [x1, y1, x2, y2] scaled between 0 and 1000 to the image width and height.
@@ -187,21 +246,13 @@ Return JSON as a list:
 ]
 """
 
-        response = await asyncio.to_thread(
-            bedrock.converse,
-            modelId=model_id,
-            messages=[
-                {
-                    "role": "user",
-                    "content": [
-                        {"image": {"format": img_format, "source": {"bytes": attachment.data}}},
-                        {"text": prompt},
-                    ],
-                }
-            ],
-            inferenceConfig={"maxTokens": 1024, "temperature": 0},
+        return await _analyze(
+            "locate_in_image",
+            attachment,
+            block="image",
+            prompt=prompt,
+            inference_config={"maxTokens": 1024, "temperature": 0},
         )
-        return _extract_text_from_converse(response)
 
     @tool(
         name="summarize_video",
@@ -217,22 +268,13 @@ Return JSON as a list:
         if attachment is None:
             return "No video uploaded for this chat. Upload a video first."
 
-        vid_format = _guess_format_from_content_type(attachment.content_type)
-        response = await asyncio.to_thread(
-            bedrock.converse,
-            modelId=model_id,
-            messages=[
-                {
-                    "role": "user",
-                    "content": [
-                        {"video": {"format": vid_format, "source": {"bytes": attachment.data}}},
-                        {"text": user_prompt},
-                    ],
-                }
-            ],
-            inferenceConfig={"maxTokens": 1024, "temperature": 0},
+        return await _analyze(
+            "summarize_video",
+            attachment,
+            block="video",
+            prompt=user_prompt,
+            inference_config={"maxTokens": 1024, "temperature": 0},
         )
-        return _extract_text_from_converse(response)
 
     @tool(
         name="dense_caption_video",
@@ -248,22 +290,13 @@ Return JSON as a list:
         if attachment is None:
             return "No video uploaded for this chat. Upload a video first."
 
-        vid_format = _guess_format_from_content_type(attachment.content_type)
-        response = await asyncio.to_thread(
-            bedrock.converse,
-            modelId=model_id,
-            messages=[
-                {
-                    "role": "user",
-                    "content": [
-                        {"video": {"format": vid_format, "source": {"bytes": attachment.data}}},
-                        {"text": user_prompt},
-                    ],
-                }
-            ],
-            inferenceConfig={"maxTokens": 2048, "temperature": 0},
+        return await _analyze(
+            "dense_caption_video",
+            attachment,
+            block="video",
+            prompt=user_prompt,
+            inference_config={"maxTokens": 2048, "temperature": 0},
         )
-        return _extract_text_from_converse(response)
 
     @tool(
         name="find_video_event_times",
@@ -279,27 +312,18 @@ Return JSON as a list:
         if attachment is None:
             return "No video uploaded for this chat. Upload a video first."
 
-        vid_format = _guess_format_from_content_type(attachment.content_type)
         prompt = (
             f'Please localize the moment that the event "{event_description}" happens in the video. '
             "Answer with the starting and ending time of the event in seconds, such as [[72, 82]]. "
             "If the event happens multiple times, list all of them like [[40, 50], [72, 82]]."
         )
-        response = await asyncio.to_thread(
-            bedrock.converse,
-            modelId=model_id,
-            messages=[
-                {
-                    "role": "user",
-                    "content": [
-                        {"video": {"format": vid_format, "source": {"bytes": attachment.data}}},
-                        {"text": prompt},
-                    ],
-                }
-            ],
-            inferenceConfig={"maxTokens": 512, "temperature": 0},
+        return await _analyze(
+            "find_video_event_times",
+            attachment,
+            block="video",
+            prompt=prompt,
+            inference_config={"maxTokens": 512, "temperature": 0},
         )
-        return _extract_text_from_converse(response)
 
     @tool(
         name="classify_video",
@@ -315,23 +339,14 @@ Return JSON as a list:
         if attachment is None:
             return "No video uploaded for this chat. Upload a video first."
 
-        vid_format = _guess_format_from_content_type(attachment.content_type)
         prompt = "What is the most appropriate category for this video? Select your answer from the options provided:\n" + categories.strip()
-        response = await asyncio.to_thread(
-            bedrock.converse,
-            modelId=model_id,
-            messages=[
-                {
-                    "role": "user",
-                    "content": [
-                        {"video": {"format": vid_format, "source": {"bytes": attachment.data}}},
-                        {"text": prompt},
-                    ],
-                }
-            ],
-            inferenceConfig={"maxTokens": 256, "temperature": 0},
+        return await _analyze(
+            "classify_video",
+            attachment,
+            block="video",
+            prompt=prompt,
+            inference_config={"maxTokens": 256, "temperature": 0},
         )
-        return _extract_text_from_converse(response)
 
     tools = [
         extract_image_text,
@@ -1,32 +1,60 @@
 import logging
-import asyncio
-import boto3
 from strands import tool
 from src.services.knowledge_base import KnowledgeBaseService
+from src.services.prefetch import RetrievalPrefetcher
 from src.core.config import settings
+from src.core.clients import BedrockClientFactory
 from src.core.prompts import get_rag_synthesis_prompt
+from src.services.synthesis import PartialAnswer, spoken_answer, synthesize
 
 logger = logging.getLogger(__name__)
 
-def get_rag_tool(kb: KnowledgeBaseService, session: boto3.Session, *, chat_id: str):
-    bedrock = session.client("bedrock-runtime", region_name=settings.AWS_REGION)
+def get_rag_tool(
+    kb: KnowledgeBaseService,
+    clients: BedrockClientFactory,
+    *,
+    chat_id: str,
+    prefetcher: RetrievalPrefetcher | None = None,
+):
+    bedrock = clients.get("rag")
 
     @tool(name="search_internal_documents", description="MANDATORY tool to use when the user asks about uploaded files, PDFs, 'this document', or any specific info that might be in a document. This is your ONLY way to access documents. You DO have access to files through this tool.")
     async def search_internal_documents(query: str) -> str:
-        context = kb.retrieve(query, chat_id=chat_id)
+        # Read the version before retrieving: an ingest that lands mid-call makes this entry unreachable.
+        version = kb.corpus_version(chat_id)
+        if kb.answer_cache is not None:
+            cached = kb.answer_cache.get(chat_id, version, query)
+            if cached is not None:
+                logger.info(f"RAG answer cache hit for chat {chat_id}.")
+                # The cache holds the full answer; speak the same cut as a fresh call would.
+                return spoken_answer(cached)
+
+        context = await prefetcher.take(chat_id, query) if prefetcher is not None else None
+        if context is None:
+            context = await kb.aretrieve(query, chat_id=chat_id)
         if "No relevant information" in context: return context
 
         prompt = get_rag_synthesis_prompt(context, query)
         
+        def cache_answer(answer: str) -> None:
+            # Skip if the corpus changed (or the chat was cleared, resetting the version) mid-call.
+            if kb.answer_cache is not None and kb.corpus_version(chat_id) == version:
+                kb.answer_cache.put(chat_id, version, query, answer)
+
         try:
-            response = await asyncio.to_thread(
-                bedrock.converse,
-                modelId=settings.NOVA_LITE_MODEL_ID,
-                messages=[{"role": "user", "content": [{"text": prompt}]}],
-                inferenceConfig={"maxTokens": 200, "temperature": 0},
+            # An early-returned (truncated) answer is never cached; the full text arrives via on_complete.
+            answer = await synthesize(
+                bedrock,
+                workload="rag",
+                tool="search_internal_documents",
+                model_id=settings.NOVA_LITE_MODEL_ID,
+                prompt=prompt,
+                max_tokens=200,
+                on_complete=cache_answer,
             )
-            answer = response['output']['message']['content'][0]['text']
             logger.info(f"Nova Lite (RAG): {answer}")
+            if not isinstance(answer, PartialAnswer):
+                cache_answer(answer)
             return answer
         except Exception:
             return context[:500]
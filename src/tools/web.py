@@ -1,20 +1,28 @@
 import logging
-import asyncio
-import boto3
-from botocore.config import Config
 from ddgs import DDGS
 from strands import tool
 from src.core.config import settings
+from src.core.clients import BedrockClientFactory
+from src.core.executors import run_in
+from src.core.resilience import call_bedrock
 from src.core.prompts import get_web_synthesis_prompt
+from src.services.hedging import HedgeStats, hedge
+from src.services.synthesis import PartialAnswer, synthesize
+from src.services.web_cache import get_web_cache, normalize_web_query
 
 logger = logging.getLogger(__name__)
 
-def get_web_search_tool(session: boto3.Session):
-    bedrock = session.client(
-        "bedrock-runtime",
-        region_name=settings.AWS_REGION,
-        config=Config(read_timeout=3600),
-    )
+
+class WebSearchUnavailable(RuntimeError):
+    """Grounding-only search produced no answer; reported to the user, never cached."""
+
+
+# Shared by every session's web_search tool; served at /api/metrics/web-search.
+hedge_stats = HedgeStats()
+
+
+def get_web_search_tool(clients: BedrockClientFactory):
+    bedrock = clients.get("web")
 
     def _extract_grounding_sources(converse_response: dict, *, limit: int) -> list[str]:
         content_list = (
@@ -74,8 +82,11 @@ def get_web_search_tool(session: boto3.Session):
 
             model_id = settings.NOVA_GROUNDING_MODEL_ID or settings.NOVA_LITE_MODEL_ID
             try:
-                response = await asyncio.to_thread(
+                response = await run_in(
+                    "web",
+                    call_bedrock,
                     bedrock.converse,
+                    workload="web",
                     modelId=model_id,
                     messages=[{"role": "user", "content": [{"text": prompt}]}],
                     toolConfig=tool_config,
@@ -111,16 +122,33 @@ def get_web_search_tool(session: boto3.Session):
             with DDGS() as ddgs:
                 return ddgs.text(query, max_results=8)
 
-        try:
-            backend = (settings.WEB_SEARCH_BACKEND or "auto").lower()
+        backend = (settings.WEB_SEARCH_BACKEND or "auto").lower()
+        normalized = normalize_web_query(query)
+
+        async def search() -> str:
+            if backend == "auto" and settings.WEB_SEARCH_HEDGE_DELAY_S >= 0:
+                # Grounding is preferred, but DDGS starts after the hedge delay so a slow or
+                # failing grounding call doesn't hold up the spoken turn.
+                return await hedge(
+                    ("grounding", try_grounding),
+                    ("ddgs", ddgs_answer),
+                    delay_s=settings.WEB_SEARCH_HEDGE_DELAY_S,
+                    stats=hedge_stats,
+                )
             if backend in {"auto", "grounding"}:
                 grounded = await try_grounding()
                 if grounded is not None:
                     return grounded
                 if backend == "grounding":
-                    return "Web search is temporarily unavailable."
+                    raise WebSearchUnavailable()
+            return await ddgs_answer()
 
-            raw_results = await asyncio.to_thread(ddg_sync)
+        async def ddgs_answer() -> str:
+            # Raw hits are cached on their own so a failed synthesis (or another backend
+            # mode falling back to DDGS) does not repeat the search.
+            raw_results = await get_web_cache("results").get_or_compute(
+                ("ddgs", normalized), lambda: run_in("web", ddg_sync)
+            )
             
             snippets = []
             for r in raw_results:
@@ -134,15 +162,25 @@ def get_web_search_tool(session: boto3.Session):
             
             prompt = get_web_synthesis_prompt(context, query)
             
-            response = await asyncio.to_thread(
-                bedrock.converse,
-                modelId=settings.NOVA_LITE_MODEL_ID,
-                messages=[{"role": "user", "content": [{"text": prompt}]}],
-                inferenceConfig={"maxTokens": 1024, "temperature": 0},
+            answer = await synthesize(
+                bedrock,
+                workload="web",
+                tool="web_search",
+                model_id=settings.NOVA_LITE_MODEL_ID,
+                prompt=prompt,
+                max_tokens=1024,
             )
-            answer = response['output']['message']['content'][0]['text']
             logger.info(f"Nova Lite (Web): {answer}")
             return answer
+
+        try:
+            # Identical questions from concurrent sessions share one upstream search and synthesis.
+            # Early-returned (truncated) DDGS answers are shared but never cached.
+            return await get_web_cache("answers").get_or_compute(
+                (backend, normalized), search, cacheable=lambda answer: not isinstance(answer, PartialAnswer)
+            )
+        except WebSearchUnavailable:
+            return "Web search is temporarily unavailable."
         except Exception:
             return "Web search failed."
             
@@ -285,8 +285,8 @@ fileInput.onchange = async () => {
     try {
         const res = await fetch(`/api/knowledge/ingest?chat_id=${encodeURIComponent(chatId)}`, { method: 'POST', body: formData });
         const data = await res.json();
-        if (data.status === 'success') {
-            setUploadStatus("Done! " + data.chunks + " chunks added.", "success");
+        if (data.status === 'accepted') {
+            setUploadStatus("Queued " + file.name + "...", "info");
         } else {
             throw new Error();
         }
@@ -295,6 +295,23 @@ fileInput.onchange = async () => {
     }
 };
 
+function renderIngestProgress(job) {
+    if (job.status === 'completed') {
+        const reused = job.chunksReused ? ` (${job.chunksReused} already indexed)` : "";
+        setUploadStatus("Done! " + job.chunksNew + " new chunks added" + reused + ".", "success");
+    } else if (job.status === 'failed') {
+        setUploadStatus("Ingest failed: " + (job.error || job.filename), "error");
+    } else if (job.status === 'cancelled') {
+        setUploadStatus("Ingest cancelled", "warn");
+    } else if (job.stage === 'indexing' && job.chunksTotal > 0) {
+        setUploadStatus(`Indexing ${job.filename}: ${job.chunksDone}/${job.chunksTotal} chunks`, "info");
+    } else if (job.stage === 'indexing' && job.chunksDone > 0) {
+        setUploadStatus(`Indexing ${job.filename}: ${job.chunksDone} chunks`, "info");
+    } else {
+        setUploadStatus(`${job.filename}: ${job.stage}...`, "info");
+    }
+}
+
 // Media Upload (image/video) for multimodal tools
 if (mediaInput) {
     mediaInput.onchange = async () => {
@@ -491,6 +508,8 @@ startBtn.onclick = async () => {
                     if (data.event.userTranscript.trim().length > 2) stopPlayback();
                     document.querySelectorAll('[data-role="bot-active"]').forEach(m => delete m.dataset.role);
                     addMessage(data.event.userTranscript, 'user');
+                } else if (data.event?.ingestProgress) {
+                    renderIngestProgress(data.event.ingestProgress);
                 } else if (data.event?.statusUpdate) {
                     status.innerText = data.event.statusUpdate;
                 }
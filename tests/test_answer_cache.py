@@ -0,0 +1,33 @@
+import pytest
+
+from src.services.answer_cache import AnswerCache, normalize_query
+
+
+@pytest.mark.parametrize(
+    "first, second",
+    [
+        ("What is C++?", "what is C#"),
+        ("what changed in v1.2", "what changed in v12"),
+        ("what is .NET", "what is NET"),
+        ("GPT-4 pricing", "GPT4 pricing"),
+    ],
+)
+def test_distinct_technical_queries_do_not_collide(first, second):
+    assert normalize_query(first) != normalize_query(second)
+
+    cache = AnswerCache(ttl_s=60, max_entries=10)
+    cache.put("chat-1", 1, first, "first answer")
+    assert cache.get("chat-1", 1, second) is None
+    assert cache.get("chat-1", 1, first) == "first answer"
+
+
+@pytest.mark.parametrize(
+    "first, second",
+    [
+        ("What's the PDF about?", "what is this pdf about"),
+        ("Um, what is C++?", "what is c++"),
+        ("Summarize the v1.2 notes.", "summarize v1.2 notes"),
+    ],
+)
+def test_rephrased_queries_share_a_key(first, second):
+    assert normalize_query(first) == normalize_query(second)
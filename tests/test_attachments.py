@@ -0,0 +1,55 @@
+from datetime import datetime, timezone
+
+from src.core.attachments import AttachmentPayload, AttachmentStore, ChatAttachment
+from src.core.images import ImageRendition
+
+RENDITION_BYTES = 300
+
+
+class _RenditionStore(AttachmentStore):
+    """Attaches a fixed-size rendition to every image, without needing Pillow."""
+
+    def _prepare(self, attachment: ChatAttachment) -> None:
+        attachment.payload.rendition = ImageRendition(
+            data=b"r" * RENDITION_BYTES, content_type="image/jpeg", width=10, height=10
+        )
+
+
+def _image(attachment_id: str, data: bytes) -> ChatAttachment:
+    return ChatAttachment(
+        attachment_id=attachment_id,
+        filename=f"{attachment_id}.png",
+        content_type="image/png",
+        media_type="image",
+        payload=AttachmentPayload(data),
+        created_at=datetime.now(timezone.utc),
+    )
+
+
+def test_renditions_count_against_quotas():
+    # Two 1000-byte images fit the chat quota on their own, but not with their renditions.
+    store = _RenditionStore(chat_quota_bytes=2500, total_quota_bytes=10_000)
+    store.add("chat-1", _image("a", b"a" * 1000))
+    assert store.stats()["logical_bytes"] == 1000 + RENDITION_BYTES
+
+    store.add("chat-1", _image("b", b"b" * 1000))
+    stats = store.stats()
+    assert [a.attachment_id for a in store.list("chat-1")] == ["b"]
+    assert stats["evictions"] == 1
+    assert stats["logical_bytes"] == 1000 + RENDITION_BYTES
+    assert stats["resident_bytes"] == 1000 + RENDITION_BYTES
+
+    store.clear_chat("chat-1")
+    stats = store.stats()
+    assert stats["logical_bytes"] == 0
+    assert stats["resident_bytes"] == 0
+
+
+def test_shared_blob_charges_its_rendition_once_globally():
+    store = _RenditionStore(chat_quota_bytes=10_000, total_quota_bytes=10_000)
+    store.add("chat-1", _image("a", b"x" * 1000))
+    store.add("chat-2", _image("a", b"x" * 1000))
+    stats = store.stats()
+    assert stats["logical_bytes"] == 2 * (1000 + RENDITION_BYTES)
+    assert stats["deduplicated_bytes"] == 1000 + RENDITION_BYTES
+    assert stats["logical_bytes"] - stats["deduplicated_bytes"] == 1000 + RENDITION_BYTES
@@ -0,0 +1,81 @@
+import asyncio
+import threading
+import time
+
+from src.core.executors import get_executor
+from src.services.knowledge_base import KnowledgeBaseService
+
+# Each stubbed retrieval blocks its thread this long; if any of it ran on the event
+# loop, the loop would stall for at least this long.
+BLOCKING_S = 0.1
+MAX_LAG_S = 0.05
+CONCURRENT_RETRIEVALS = 16
+
+
+class _SlowEmbedder:
+    def embed(self, text):
+        time.sleep(BLOCKING_S / 2)
+        return [0.0]
+
+
+class _SlowStore:
+    def query(self, chat_id, embedding, *, n_results):
+        time.sleep(BLOCKING_S / 2)
+        return [(f"{chat_id}-1", "Some retrieved text.", {"filename": "doc.pdf", "page": 1})]
+
+
+def _stub_kb() -> KnowledgeBaseService:
+    # Only what the retrieval path touches; no Bedrock or Chroma.
+    kb = KnowledgeBaseService.__new__(KnowledgeBaseService)
+    kb.query_embedder = _SlowEmbedder()
+    kb.store = _SlowStore()
+    kb._lexical_lock = threading.Lock()
+    kb._lexical_indexes = {}
+    return kb
+
+
+async def _max_loop_lag(until: asyncio.Future, interval_s: float = 0.005) -> float:
+    lag = 0.0
+    while not until.done():
+        expected = time.perf_counter() + interval_s
+        await asyncio.sleep(interval_s)
+        lag = max(lag, time.perf_counter() - expected)
+    return lag
+
+
+def test_concurrent_aretrieve_does_not_block_event_loop():
+    kb = _stub_kb()
+
+    async def scenario():
+        retrievals = asyncio.gather(
+            *(kb.aretrieve("what is in the doc", chat_id=f"chat-{i}") for i in range(CONCURRENT_RETRIEVALS))
+        )
+        lag = await _max_loop_lag(retrievals)
+        return await retrievals, lag
+
+    results, lag = asyncio.run(scenario())
+
+    assert len(results) == CONCURRENT_RETRIEVALS
+    assert all("Some retrieved text." in context for context in results)
+    assert lag < MAX_LAG_S, f"event loop stalled for {lag * 1000:.0f}ms during concurrent retrievals"
+
+
+def test_clear_chat_does_not_queue_behind_ingests():
+    kb = _stub_kb()
+    release = threading.Event()
+    cleared = []
+    kb.clear_chat = lambda chat_id: cleared.append(chat_id) or True
+
+    async def scenario():
+        ingest = get_executor("ingest")
+        # Occupy every ingest thread, as long PDF ingests would.
+        busy = [ingest.submit(release.wait) for _ in range(ingest.max_workers)]
+        try:
+            return await asyncio.wait_for(kb.aclear_chat("chat-1"), timeout=1.0)
+        finally:
+            release.set()
+            for future in busy:
+                future.result()
+
+    assert asyncio.run(scenario()) is True
+    assert cleared == ["chat-1"]
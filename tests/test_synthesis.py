@@ -0,0 +1,56 @@
+import asyncio
+
+import pytest
+
+from src.services.synthesis import PartialAnswer, _first_sentence_end, spoken_answer, synthesize
+
+ANSWER = "Sure, here is what I found. The contract, e.g. the 2024 renewal, ends in May. It renews yearly after that."
+
+
+class _StreamingBedrock:
+    def __init__(self, text: str, chunk: int) -> None:
+        self.deltas = [text[i:i + chunk] for i in range(0, len(text), chunk)]
+
+    def converse_stream(self, **kwargs):
+        return {"stream": ({"contentBlockDelta": {"delta": {"text": d}}} for d in self.deltas)}
+
+
+@pytest.mark.parametrize(
+    "text, first",
+    [
+        ("Dr. Smith wrote the report on taxes. Next", "Dr. Smith wrote the report on taxes."),
+        ("Use a tool, e.g. the CLI, for bulk uploads. Next", "Use a tool, e.g. the CLI, for bulk uploads."),
+        ("Sure, here is what I found. The file covers taxes. Next", "Sure, here is what I found. The file covers taxes."),
+        ("The steps:\n1. Open the app and sign in. Next", "The steps:\n1. Open the app and sign in."),
+    ],
+)
+def test_first_sentence_skips_abbreviations_and_filler(text, first):
+    assert text[:_first_sentence_end(text)].strip() == first
+
+
+@pytest.mark.parametrize("chunk", [1, 3, 7, 50])
+def test_cached_repeat_speaks_the_same_answer_as_the_first_call(chunk):
+    completed = []
+
+    async def scenario():
+        answer = await synthesize(
+            _StreamingBedrock(ANSWER, chunk),
+            workload="rag",
+            tool="test",
+            model_id="test-model",
+            prompt="question",
+            max_tokens=100,
+            on_complete=completed.append,
+        )
+        for _ in range(100):
+            if completed:
+                break
+            await asyncio.sleep(0.01)
+        return answer
+
+    first = asyncio.run(scenario())
+
+    assert isinstance(first, PartialAnswer)
+    assert first == "Sure, here is what I found. The contract, e.g. the 2024 renewal, ends in May."
+    assert completed == [ANSWER]
+    assert spoken_answer(completed[0]) == first